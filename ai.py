@@ -0,0 +1,167 @@
+"""
+Probability-density opponent for the 3D Submarines Game.
+- For every unfired cell, counts the legal placements of each remaining
+  PieceType that cover it and are consistent with the shots seen so far
+- Fires at the densest cell; after a HIT, at the cells most likely to
+  complete the damaged vessel
+- Counts are updated incrementally as each shot resolves, touching only the
+  placements through the fired cell
+"""
+import random
+from typing import Dict, List, Optional, Set
+
+from main import Coordinate, PieceType, Signal, ShapeTable, _SINGLE_HIT, _layer_of, shape_table
+
+# Density scale: the low bits below it hold a random tie-breaker
+_TIE = 1 << 10
+# Density of a fired cell, below any reachable count
+_FIRED = -(1 << 62)
+
+
+class DensityAI:
+    """
+    Targets the cell covered by the most still-possible placements.
+    Placement counts per cell are kept per layer (each layer holds one vessel
+    type); the General adds one to every unfired cell. Same interface as
+    simulate.HuntTargetAI: choose() and observe(coord, sig).
+    """
+    def __init__(self, depth: int, rows: int, cols: int,
+                 counts: Dict[PieceType, int], rng: random.Random):
+        self.depth, self.rows, self.cols = depth, rows, cols
+        self._layer = rows * cols
+        # per layer: placement table and placements still possible (None for
+        # layers only the General uses), and per cell the number of those
+        # placements covering it, scaled by _TIE with random low bits to break
+        # ties; fired cells hold _FIRED
+        self._tables: List[Optional[ShapeTable]] = [None] * depth
+        self._alive: List[Optional[bytearray]] = [None] * depth
+        self._density: List[List[int]] = [
+            [rng.randrange(_TIE) for _ in range(self._layer)] for _ in range(depth)]
+        # pieces of the layer's type not yet sunk
+        self._remaining = [0] * depth
+        for ptype, num in counts.items():
+            z = _layer_of(ptype)
+            if ptype is PieceType.GENERAL or not num or z >= depth:
+                continue
+            table = shape_table(ptype, rows, cols)
+            self._tables[z] = table
+            self._alive[z] = bytearray(b'\x01' * len(table.cells))
+            density = self._density[z]
+            for c, ids in enumerate(table.covering):
+                density[c] += len(ids) * _TIE
+            self._remaining[z] = num
+        # cells that may belong to an already sunk single-hit vessel
+        self._shadow: List[Set[int]] = [set() for _ in range(depth)]
+        self._fired = bytearray(depth * self._layer)
+        # damaged cells of vessels not yet sunk, as volume indices
+        self._open_hits: Set[int] = set()
+
+    def choose(self) -> Coordinate:
+        """Next cell to fire at; never one fired before."""
+        v = self._target() if self._open_hits else None
+        if v is None:
+            v = self._hunt()
+        z, c = divmod(v, self._layer)
+        y, x = divmod(c, self.cols)
+        return (x, y, z)
+
+    def observe(self, coord: Coordinate, sig: Signal):
+        """Record the outcome of the last shot and update the counts."""
+        x, y, z = coord
+        c = y * self.cols + x
+        v = z * self._layer + c
+        self._fired[v] = 1
+        self._density[z][c] = _FIRED
+        if self._tables[z] is None:
+            return
+        if sig is Signal.MISS:
+            self._drop_covering(z, c)
+        elif sig is Signal.HIT:
+            self._open_hits.add(v)
+        elif self._tables[z].ptype in _SINGLE_HIT:
+            self._kill(z, c)
+        else:
+            self._sink(z, c)
+
+    def _hunt(self) -> int:
+        """
+        Unfired cell with the highest placement density, weighted by the
+        pieces left on its layer (plus one for the General).
+        """
+        best, best_v = -1, -1
+        for z, density in enumerate(self._density):
+            top = max(density)
+            if top < 0:
+                continue  # every cell of the layer fired
+            score = (1 + self._remaining[z] * (top // _TIE)) * _TIE + top % _TIE
+            if score > best:
+                best, best_v = score, z * self._layer + density.index(top)
+        return best_v
+
+    def _target(self) -> Optional[int]:
+        """
+        Unfired cell most often shared by placements through the open hits;
+        placements covering several open hits count more.
+        """
+        layer = self._layer
+        scores: Dict[int, int] = {}
+        seen = set()
+        for h in self._open_hits:
+            z, hc = divmod(h, layer)
+            table, alive = self._tables[z], self._alive[z]
+            base = z * layer
+            for pid in table.covering[hc]:
+                if not alive[pid] or (z, pid) in seen:
+                    continue
+                seen.add((z, pid))
+                cells = table.cells[pid]
+                weight = sum(1 for cc in cells if base + cc in self._open_hits) ** 2
+                for cc in cells:
+                    if not self._fired[base + cc]:
+                        scores[base + cc] = scores.get(base + cc, 0) + weight
+        if not scores:
+            return None
+        return max(scores, key=scores.get)
+
+    def _drop_covering(self, z: int, c: int):
+        """Rule out every placement on layer z that covers cell c."""
+        table, alive, density = self._tables[z], self._alive[z], self._density[z]
+        for pid in table.covering[c]:
+            if alive[pid]:
+                alive[pid] = 0
+                for cc in table.cells[pid]:
+                    density[cc] -= _TIE
+
+    def _kill(self, z: int, c: int):
+        """
+        A single-hit vessel was killed at cell c. Unless c may be another cell
+        of a vessel killed earlier, one fewer is left; either way nothing else
+        can use c.
+        """
+        table, alive = self._tables[z], self._alive[z]
+        shadow = self._shadow[z]
+        if c not in shadow:
+            self._remaining[z] = max(self._remaining[z] - 1, 0)
+            for pid in table.covering[c]:
+                if alive[pid]:
+                    shadow.update(table.cells[pid])
+        self._drop_covering(z, c)
+
+    def _sink(self, z: int, c: int):
+        """
+        A multi-hit vessel sank at cell c: find a placement through c made only
+        of damaged cells, close those hits and rule out their placements.
+        """
+        table, alive = self._tables[z], self._alive[z]
+        base = z * self._layer
+        hit = {h - base for h in self._open_hits if h // self._layer == z}
+        hit.add(c)
+        wreck = (c,)
+        for pid in table.covering[c]:
+            if alive[pid] and all(cc in hit for cc in table.cells[pid]):
+                wreck = table.cells[pid]
+                break
+        for cc in wreck:
+            self._open_hits.discard(base + cc)
+            self._drop_covering(z, cc)
+        self._remaining[z] = max(self._remaining[z] - 1, 0)
@@ -0,0 +1,785 @@
+"""
+Benchmarks for the 3D Submarines Game hot paths.
+Run with: python bench.py
+
+Regression suite: python bench.py --suite [--json out.json] [--compare baseline.json]
+times each hot path per board size and fleet density, writes the results as
+JSON and, given a baseline, flags every case that got slower than allowed.
+"""
+import argparse
+import asyncio
+import copy
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from heatmap import placement_density
+from layouts import LayoutPool
+from main import (Coordinate, PieceType, Signal, Board3D, Game, PieceTable,
+                  _ROTATIONS, _SHAPES_2D, _get_rotations, _layer_of, _normalize,
+                  shape_table)
+from render import NullRenderer, TextRenderer
+from server import GameServer, random_player
+from simulate import HuntTargetAI, play_headless
+from posterior import PosteriorSampler
+from stats import GameStats
+
+# Fleet used by the benchmarks: a fairly dense 3 x 20 x 20 board
+BENCH_DIMS = (3, 20, 20)
+BENCH_COUNTS: Dict[PieceType, int] = {
+    PieceType.SUBMARINE: 30,
+    PieceType.DESTROYER: 25,
+    PieceType.JET: 12,
+    PieceType.GENERAL: 1,
+}
+
+### Reference implementations ###
+
+@dataclass(eq=False)
+class _SetPiece:
+    """
+    The original Piece record (two sets per piece) and its hit logic;
+    baseline for PieceTable memory and for the dict/set firing path.
+    """
+    piece_type: PieceType
+    coords: FrozenSet[Coordinate]
+    hits: Set[Coordinate] = field(default_factory=set)
+
+    def register_hit(self, coord: Coordinate) -> Signal:
+        if coord not in self.coords:
+            return Signal.MISS
+        self.hits.add(coord)
+        if self.piece_type in (PieceType.SUBMARINE, PieceType.JET, PieceType.GENERAL):
+            return Signal.KILL
+        if self.hits == self.coords:
+            return Signal.KILL
+        return Signal.HIT
+
+    def is_sunk(self) -> bool:
+        if self.piece_type in (PieceType.SUBMARINE, PieceType.JET, PieceType.GENERAL):
+            return bool(self.hits)
+        return self.hits == self.coords
+
+
+class _DictBoard(Board3D):
+    """
+    Board3D with the original dict/set firing path: placement runs as usual,
+    and each placed piece is mirrored into a _SetPiece behind a
+    Coordinate -> piece dict, which receive_fire and all_non_general_sunk
+    use alone. Kept only as the baseline the bitboard backend is measured
+    against.
+    """
+    def _add_cells(self, ptype, cells):
+        piece = super()._add_cells(ptype, cells)
+        if not hasattr(self, '_cells'):
+            self._cells, self._set_pieces = {}, []
+        record = _SetPiece(ptype, frozenset(piece.coords))
+        self._set_pieces.append(record)
+        for c in record.coords:
+            self._cells[c] = record
+        return piece
+
+    def receive_fire(self, coord):
+        piece = self._cells.get(coord)
+        if not piece:
+            return Signal.MISS
+        return piece.register_hit(coord)
+
+    def all_non_general_sunk(self) -> bool:
+        return all(
+            p.is_sunk()
+            for p in self._set_pieces
+            if p.piece_type != PieceType.GENERAL
+        )
+
+
+def _density_py(blocked, ptype):
+    """Pure-Python placement counts per cell; reference for heatmap.placement_density."""
+    rows, cols = len(blocked), len(blocked[0])
+    density = [[0] * cols for _ in range(rows)]
+    for rot in _ROTATIONS[ptype]:
+        for y0 in range(rows - rot.height + 1):
+            for x0 in range(cols - rot.width + 1):
+                if any(blocked[y0 + y][x0 + x] for x, y in rot.offsets):
+                    continue
+                for x, y in rot.offsets:
+                    density[y0 + y][x0 + x] += 1
+    return density
+
+def _exact_occupancy(ptype: PieceType, num: int, rows: int, cols: int):
+    """
+    Probability that each cell of a rows x cols layer is covered when a layout
+    of num ptype pieces is drawn uniformly, by enumerating every layout.
+    """
+    masks = tuple(shape_table(ptype, rows, cols).masks)
+    covered = [0] * (rows * cols)
+    total = 0
+    def walk(start, left, used):
+        nonlocal total
+        if not left:
+            total += 1
+            for c in range(rows * cols):
+                covered[c] += used >> c & 1
+            return
+        for i in range(start, len(masks)):
+            if not masks[i] & used:
+                walk(i + 1, left - 1, used | masks[i])
+    walk(0, num, 0)
+    return [n / total for n in covered]
+
+def _print_view_py(game, file):
+    """The original print-per-row view; baseline for render.TextRenderer."""
+    board = game.boards[0]
+    view = game._view[game.current]
+    print(f"Player {game.current+1}'s view (levels 0..{board.depth-1}):", file=file)
+    for z in range(board.depth):
+        print(f" Level {z}:", file=file)
+        for y in range(board.rows):
+            start = (z * board.rows + y) * board.cols
+            print(' '.join(view[start:start + board.cols].decode()), file=file)
+        print(file=file)
+
+
+class _CountingStream(io.StringIO):
+    """StringIO that counts write() calls."""
+    writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+### Helpers ###
+
+def _best_of(fn: Callable[[], float], repeat: int = 5) -> float:
+    """Run fn (which returns its own elapsed seconds) and keep the fastest run."""
+    return min(fn() for _ in range(repeat))
+
+
+def _make_board(cls, seed: int) -> Board3D:
+    board = cls(*BENCH_DIMS, rng=seed)
+    board.place_all(BENCH_COUNTS)
+    return board
+
+
+def _all_coords(board: Board3D, seed: int):
+    coords = [(x, y, z)
+              for z in range(board.depth)
+              for y in range(board.rows)
+              for x in range(board.cols)]
+    random.Random(seed).shuffle(coords)
+    return coords
+
+### Benchmarks ###
+
+def bench_receive_fire(cls) -> float:
+    """Fire at every cell of a fresh board once, in random order."""
+    def run():
+        board = _make_board(cls, 1)
+        coords = _all_coords(board, 2)
+        fire = board.receive_fire
+        t0 = time.perf_counter()
+        for c in coords:
+            fire(c)
+        return time.perf_counter() - t0
+    return _best_of(run)
+
+
+def bench_receive_fire_at() -> float:
+    """bench_receive_fire on Board3D through flat cell indices, no tuples."""
+    def run():
+        board = _make_board(Board3D, 1)
+        cells = [board.index(c) for c in _all_coords(board, 2)]
+        fire = board.receive_fire_at
+        t0 = time.perf_counter()
+        for i in cells:
+            fire(i)
+        return time.perf_counter() - t0
+    return _best_of(run)
+
+
+# Large-map board for the batch firing comparison
+LARGE_DIMS = (3, 100, 100)
+LARGE_COUNTS: Dict[PieceType, int] = {
+    PieceType.SUBMARINE: 800,
+    PieceType.DESTROYER: 600,
+    PieceType.JET: 300,
+    PieceType.GENERAL: 1,
+}
+
+
+def bench_fire_sequence(batch: bool, dims=BENCH_DIMS, counts=BENCH_COUNTS) -> float:
+    """
+    Fire at every cell of a fresh board once, in random order, by flat index:
+    one receive_fire_at call per shot, or a single receive_fire_batch call.
+    """
+    layout = Board3D(*dims, rng=1)
+    layout.place_all(counts)
+    layout = layout.layout()
+    cells = list(range(dims[0] * dims[1] * dims[2]))
+    random.Random(2).shuffle(cells)
+    shots = np.array(cells)
+    def run():
+        board = Board3D(*dims)
+        board.apply_layout(layout)
+        t0 = time.perf_counter()
+        if batch:
+            board.receive_fire_batch(shots)
+        else:
+            fire = board.receive_fire_at
+            for i in cells:
+                fire(i)
+        return time.perf_counter() - t0
+    return _best_of(run)
+
+
+def bench_all_non_general_sunk(cls) -> float:
+    """Game-loop pattern: check the fleet-elimination condition after every shot."""
+    def run():
+        board = _make_board(cls, 1)
+        coords = _all_coords(board, 2)
+        fire, sunk = board.receive_fire, board.all_non_general_sunk
+        for c in coords:
+            fire(c)
+        t0 = time.perf_counter()
+        for _ in coords:
+            sunk()
+        return time.perf_counter() - t0
+    return _best_of(run)
+
+
+def bench_density(size: int, impl: str) -> float:
+    """JET placement counts over a size x size layer with 10% of cells blocked."""
+    rng = np.random.default_rng(size)
+    blocked = rng.random((size, size)) < 0.1
+    blocked_rows = blocked.tolist()
+    def run():
+        t0 = time.perf_counter()
+        if impl == 'numpy':
+            placement_density(blocked, PieceType.JET)
+        else:
+            _density_py(blocked_rows, PieceType.JET)
+        return time.perf_counter() - t0
+    return _best_of(run, repeat=3)
+
+
+def bench_piece_store(size: int):
+    """
+    Memory of a size x size large-map layer tiled with horizontal submarines,
+    as _SetPiece records vs one PieceTable. Returns (pieces, set bytes, table bytes).
+    """
+    runs = [[y * size + x, y * size + x + 1, y * size + x + 2]
+            for y in range(size) for x in range(0, size - 2, 3)]
+    def measure(build):
+        tracemalloc.start()
+        store = build()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del store
+        return used
+    def sets():
+        return [_SetPiece(PieceType.SUBMARINE,
+                          frozenset((i % size, i // size, 0) for i in cells))
+                for cells in runs]
+    def table():
+        t = PieceTable(size, size)
+        for cells in runs:
+            t.add(PieceType.SUBMARINE, cells)
+        return t
+    return len(runs), measure(sets), measure(table)
+
+
+def bench_game_setup(pool: Optional[LayoutPool], games: int = 200) -> float:
+    """Per-Game construction time on the bench board, placing or from a warm pool."""
+    if pool is not None:
+        pool.warm(*BENCH_DIMS, BENCH_COUNTS)
+    def run():
+        t0 = time.perf_counter()
+        for _ in range(games):
+            if pool is None:
+                Game(*BENCH_DIMS, BENCH_COUNTS)
+            else:
+                pool.game(*BENCH_DIMS, BENCH_COUNTS)
+        return (time.perf_counter() - t0) / games
+    return _best_of(run, repeat=3)
+
+
+# Small fleet whose layouts can all be enumerated, for the sampler bias check
+BIAS_DIMS = (3, 5, 5)
+BIAS_COUNTS: Dict[PieceType, int] = {
+    PieceType.SUBMARINE: 4,
+    PieceType.DESTROYER: 3,
+    PieceType.JET: 1,
+    PieceType.GENERAL: 1,
+}
+# Crowded layer (44 of 49 cells) whose layouts are hard to move between
+CROWDED_BIAS_DIMS = (3, 7, 7)
+CROWDED_BIAS_COUNTS: Dict[PieceType, int] = {
+    PieceType.DESTROYER: 11,
+    PieceType.GENERAL: 1,
+}
+
+
+def bench_placement_bias(sampler: str, samples: int = 10000, dims=BIAS_DIMS,
+                         counts: Dict[PieceType, int] = BIAS_COUNTS):
+    """
+    Draw samples boards with place_all(sampler=...) and compare each cell's
+    occupancy frequency with its exact probability under uniform layouts.
+    Returns (largest deviation, sampling noise of that size, boards per second).
+    """
+    depth, rows, cols = dims
+    layer = rows * cols
+    fleet = [0.0] * (depth * layer)
+    area = 0
+    for ptype, num in counts.items():
+        if ptype is PieceType.GENERAL:
+            continue
+        z = _layer_of(ptype)
+        fleet[z * layer:(z + 1) * layer] = _exact_occupancy(ptype, num, rows, cols)
+        area += num * len(shape_table(ptype, rows, cols).cells[0])
+    # the General is uniform over the cells the fleet leaves free
+    free = depth * layer - area
+    exact = [p + (1 - p) / free for p in fleet]
+
+    hits = [0] * (depth * layer)
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    for _ in range(samples):
+        board = Board3D(*dims, rng=rng)
+        board.place_all(counts, sampler=sampler)
+        occ = board.occupancy
+        for c in range(depth * layer):
+            hits[c] += occ >> c & 1
+    elapsed = time.perf_counter() - t0
+    dev, noise = max((abs(h / samples - p), (p * (1 - p) / samples) ** 0.5)
+                     for h, p in zip(hits, exact))
+    return dev, noise, samples / elapsed
+
+
+def bench_render(impl: str, size: int = 50, frames: int = 20):
+    """
+    Draw frames views of a 3 x size x size game, print per row or buffered.
+    Returns (seconds per frame, writes per frame).
+    """
+    game = Game(3, size, size, {PieceType.SUBMARINE: 1, PieceType.GENERAL: 1}, seed=0)
+    stream = _CountingStream()
+    renderer = TextRenderer(stream)
+    def run():
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            if impl == 'print':
+                _print_view_py(game, stream)
+            else:
+                renderer.view(game)
+        return (time.perf_counter() - t0) / frames
+    elapsed = _best_of(run, repeat=3)
+    return elapsed, stream.writes / (3 * frames)
+
+
+def bench_branch(impl: str, branches: int = 200) -> float:
+    """
+    Branch a half-fired board on BENCH_DIMS: per branch, copy it (deepcopy)
+    or snapshot it, fire ten shots and restore. Returns seconds per branch.
+    """
+    board = _make_board(Board3D, 0)
+    coords = _all_coords(board, 0)
+    for c in coords[:len(coords) // 2]:
+        board.receive_fire(c)
+    rest = [board.index(c) for c in coords[len(coords) // 2:]]
+    def run():
+        t0 = time.perf_counter()
+        for k in range(branches):
+            shots = rest[k % 50 * 10:k % 50 * 10 + 10]
+            if impl == 'deepcopy':
+                branch = copy.deepcopy(board)
+                for i in shots:
+                    branch.receive_fire_at(i)
+            else:
+                snap = board.snapshot()
+                for i in shots:
+                    board.receive_fire_at(i)
+                board.restore(snap)
+        return (time.perf_counter() - t0) / branches
+    return _best_of(run)
+
+
+def bench_posterior(reuse: bool, samples: int = 500, turns: int = 5):
+    """
+    Posterior sampling along a game on BENCH_DIMS: after each of turns
+    ten-shot turns, bring every layer pool back to samples, either from the
+    previous turn's survivors (reuse) or with a fresh sampler.
+    Returns (seconds per turn, full layouts per second from the final pools).
+    """
+    depth, rows, cols = BENCH_DIMS
+    game = Game(depth, rows, cols, BENCH_COUNTS, seed=3, renderer=NullRenderer())
+    cells = list(range(depth * rows * cols))
+    random.Random(3).shuffle(cells)
+    sampler = PosteriorSampler(depth, rows, cols, BENCH_COUNTS, rng=3, samples=samples)
+    sampler.refresh()
+    elapsed = 0.0
+    for turn in range(turns):
+        for i in cells[turn * 10:turn * 10 + 10]:
+            game.current = 0
+            if game.winner is None:
+                game.fire_at(i)
+        t0 = time.perf_counter()
+        if not reuse:
+            sampler = PosteriorSampler(depth, rows, cols, BENCH_COUNTS, rng=turn, samples=samples)
+        sampler.update(game.ledger[0])
+        sampler.refresh()
+        elapsed += time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sampler.layouts(1000)
+    return elapsed / turns, 1000 / (time.perf_counter() - t0)
+
+
+def bench_game_stats(enabled: bool, games: int = 20) -> float:
+    """
+    Seconds per Game.fire_at shot over games complete games on BENCH_DIMS,
+    with or without a GameStats attached.
+    """
+    depth, rows, cols = BENCH_DIMS
+    def run():
+        elapsed = shots = 0
+        for seed in range(games):
+            game = Game(depth, rows, cols, BENCH_COUNTS, seed=seed, renderer=NullRenderer(),
+                        stats=GameStats() if enabled else None)
+            cells = list(range(depth * rows * cols))
+            random.Random(seed).shuffle(cells)
+            t0 = time.perf_counter()
+            for i in cells:
+                if game.winner is not None:
+                    break
+                if not game.shot_masks[game.current] >> i & 1:
+                    game.fire_at(i)
+                    shots += 1
+            elapsed += time.perf_counter() - t0
+        return elapsed / shots
+    return _best_of(run)
+
+
+def bench_server(matches: int) -> float:
+    """
+    Play matches concurrent games through one in-process GameServer over
+    local TCP, every client connected at once; returns the wall time.
+    """
+    counts = {PieceType.SUBMARINE: 1, PieceType.DESTROYER: 1,
+              PieceType.JET: 1, PieceType.GENERAL: 1}
+    async def run():
+        server = GameServer(3, 5, 5, counts)
+        srv = await server.start()
+        port = srv.sockets[0].getsockname()[1]
+        rng = random.Random(0)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(random_player('127.0.0.1', port, rng)
+                               for _ in range(2 * matches)))
+        elapsed = time.perf_counter() - t0
+        srv.close()
+        await srv.wait_closed()
+        return elapsed
+    return asyncio.run(run())
+
+
+### Regression suite ###
+
+SUITE_SIZES = (5, 10, 20, 50, 100, 200, 500)
+# Fraction of each vessel layer's cells covered by its fleet
+SUITE_DENSITIES = (0.1, 0.3)
+# Complete games take up to depth*size*size shots per player
+GAME_MAX_SIZE = 50
+# Slowdown over the baseline tolerated before a case is flagged
+SUITE_THRESHOLD = 0.25
+
+
+def suite_counts(size: int, density: float) -> Dict[PieceType, int]:
+    """Fleet covering about density of each size x size vessel layer."""
+    area = size * size
+    return {ptype: int(density * area / len(_SHAPES_2D[ptype][0]))
+            for ptype in (PieceType.SUBMARINE, PieceType.DESTROYER, PieceType.JET)
+            } | {PieceType.GENERAL: 1}
+
+
+def _scatter_layout(size: int, counts: Dict[PieceType, int], seed: int):
+    """
+    Random non-overlapping layout for a 3 x size x size board, by retrying
+    random anchors; cheap at the suite's densities and at any size, so cases
+    other than place_all do not depend on the placement engine.
+    """
+    rng = random.Random(seed)
+    layer = size * size
+    taken = bytearray(3 * layer)
+    layout = []
+    for ptype, num in counts.items():
+        for _ in range(num):
+            while True:
+                rot = rng.choice(_ROTATIONS[ptype])
+                if rot.width > size or rot.height > size:
+                    raise ValueError(f"{ptype.name} does not fit a {size}x{size} layer")
+                z = _layer_of(ptype) if ptype is not PieceType.GENERAL else rng.randrange(3)
+                x0, y0 = rng.randrange(size - rot.width + 1), rng.randrange(size - rot.height + 1)
+                cells = [z * layer + (y0 + y) * size + x0 + x for x, y in rot.offsets]
+                if not any(taken[i] for i in cells):
+                    break
+            for i in cells:
+                taken[i] = 1
+            layout.append((ptype, tuple(sorted(cells))))
+    return layout
+
+
+def _per_op(run: Callable[[], Tuple[float, int]], min_time: float = 0.2,
+            max_runs: int = 7) -> float:
+    """
+    Seconds per operation of run (which returns elapsed seconds and the
+    operations done): one untimed warm-up, then the fastest of up to
+    max_runs runs, stopping once min_time has been spent. run must repeat
+    the same work each time (fixed seeds), or the minimum picks the
+    cheapest sample rather than the least disturbed run.
+    """
+    run()
+    best, spent, runs = float('inf'), 0.0, 0
+    while runs < max_runs and (runs < 2 or spent < min_time):
+        elapsed, ops = run()
+        best = min(best, elapsed / max(ops, 1))
+        spent += elapsed
+        runs += 1
+    return best
+
+
+def _case_rotations() -> float:
+    shapes = [list(_SHAPES_2D[p][0]) for p in PieceType]
+    def run():
+        t0 = time.perf_counter()
+        for shape in shapes:
+            _get_rotations(shape)
+            _normalize(shape)
+        return time.perf_counter() - t0, len(shapes)
+    return _per_op(run)
+
+
+def _case_place_all(size: int, counts: Dict[PieceType, int]) -> float:
+    """One place_all, with the same seed every run."""
+    def run():
+        board = Board3D(3, size, size, rng=size)
+        t0 = time.perf_counter()
+        board.place_all(counts)
+        return time.perf_counter() - t0, 1
+    return _per_op(run, max_runs=5)
+
+
+def _case_receive_fire(size: int, layout) -> float:
+    """Every cell fired at once, in random order, through the coordinate API."""
+    coords = [(x, y, z) for z in range(3) for y in range(size) for x in range(size)]
+    random.Random(2).shuffle(coords)
+    def run():
+        board = Board3D(3, size, size)
+        board.apply_layout(layout)
+        fire = board.receive_fire
+        t0 = time.perf_counter()
+        for c in coords:
+            fire(c)
+        return time.perf_counter() - t0, len(coords)
+    return _per_op(run, max_runs=3)
+
+
+def _case_all_non_general_sunk(size: int, layout) -> float:
+    board = Board3D(3, size, size)
+    board.apply_layout(layout)
+    sunk = board.all_non_general_sunk
+    def run():
+        t0 = time.perf_counter()
+        for _ in range(10000):
+            sunk()
+        return time.perf_counter() - t0, 10000
+    return _per_op(run)
+
+
+def _case_print_view(size: int, layout) -> float:
+    """One _print_view frame of a game a third of the way through."""
+    game = Game(3, size, size, {}, layouts=(layout, layout), renderer=TextRenderer(io.StringIO()))
+    cells = list(range(3 * size * size))
+    random.Random(3).shuffle(cells)
+    for i in cells[:len(cells) // 3]:
+        if game.winner is None:
+            game.fire_at(i)
+    def run():
+        game.renderer.stream.seek(0)
+        game.renderer.stream.truncate()
+        t0 = time.perf_counter()
+        game._print_view()
+        return time.perf_counter() - t0, 1
+    return _per_op(run)
+
+
+def _case_headless_game(size: int, counts: Dict[PieceType, int], layout) -> float:
+    """
+    A complete HuntTargetAI vs HuntTargetAI game, placement excluded; the
+    same game every run, so runs differ only in timing.
+    """
+    def run():
+        game = Game(3, size, size, counts, layouts=(layout, layout))
+        players = [HuntTargetAI(3, size, size, counts, random.Random(size * 2 + i))
+                   for i in range(2)]
+        t0 = time.perf_counter()
+        play_headless(game, players)
+        return time.perf_counter() - t0, 1
+    return _per_op(run, max_runs=5)
+
+
+def run_suite(sizes=SUITE_SIZES, densities=SUITE_DENSITIES, log=None) -> Dict[str, float]:
+    """
+    Time every case; returns {case key: seconds per operation}.
+    Keys are 'case' or 'case/<size>x<size>/d<density>'. log, if given, is
+    called with each key and result as they come in.
+    """
+    results: Dict[str, float] = {}
+    def record(key, seconds):
+        results[key] = seconds
+        if log is not None:
+            log(key, seconds)
+    record('rotations', _case_rotations())
+    for size in sizes:
+        for density in densities:
+            tag = f"{size}x{size}/d{density}"
+            counts = suite_counts(size, density)
+            layout = _scatter_layout(size, counts, seed=size)
+            record(f"place_all/{tag}", _case_place_all(size, counts))
+            record(f"receive_fire/{tag}", _case_receive_fire(size, layout))
+            record(f"all_non_general_sunk/{tag}", _case_all_non_general_sunk(size, layout))
+            record(f"print_view/{tag}", _case_print_view(size, layout))
+            if size <= GAME_MAX_SIZE:
+                record(f"headless_game/{tag}", _case_headless_game(size, counts, layout))
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float],
+            threshold: float = SUITE_THRESHOLD) -> List[Tuple[str, float, float, float]]:
+    """
+    Cases slower than baseline by more than threshold (a fraction), as
+    (key, baseline seconds, new seconds, ratio), worst first.
+    """
+    slow = [(key, baseline[key], new, new / baseline[key])
+            for key, new in results.items()
+            if baseline.get(key) and new > baseline[key] * (1 + threshold)]
+    return sorted(slow, key=lambda r: -r[3])
+
+
+def suite_main(args) -> int:
+    sizes = tuple(int(s) for s in args.sizes.split(','))
+    densities = tuple(float(d) for d in args.densities.split(','))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    def log(key, seconds):
+        note = ''
+        if baseline and baseline.get(key):
+            note = f"   x{seconds / baseline[key]:.2f} vs baseline"
+        print(f"  {key:40s} {seconds*1e6:14.3f} us{note}", flush=True)
+    results = run_suite(sizes, densities, log)
+    if args.json:
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    if baseline is None:
+        return 0
+    slow = compare(results, baseline, args.threshold)
+    if not slow:
+        print(f"No regressions beyond {args.threshold:.0%} over {len(results)} cases.")
+        return 0
+    print(f"{len(slow)} regression(s) beyond {args.threshold:.0%}:")
+    for key, old, new, ratio in slow:
+        print(f"  {key:40s} {old*1e6:12.3f} -> {new*1e6:12.3f} us   x{ratio:.2f}")
+    return 1
+
+
+def main():
+    print(f"Board {BENCH_DIMS[0]}x{BENCH_DIMS[1]}x{BENCH_DIMS[2]}, "
+          f"{sum(BENCH_COUNTS.values())} pieces")
+    for name, bench in (("receive_fire", bench_receive_fire),
+                        ("all_non_general_sunk", bench_all_non_general_sunk)):
+        ref = bench(_DictBoard)
+        new = bench(Board3D)
+        print(f"  {name:22s} dict {ref*1e3:8.3f} ms   bitboard {new*1e3:8.3f} ms"
+              f"   speedup x{ref/new:.1f}")
+    ref = bench_receive_fire(Board3D)
+    new = bench_receive_fire_at()
+    print(f"  {'receive_fire_at':22s} tuple{ref*1e3:8.3f} ms   flat     {new*1e3:8.3f} ms"
+          f"   speedup x{ref/new:.1f}")
+    for dims, counts in ((BENCH_DIMS, BENCH_COUNTS), (LARGE_DIMS, LARGE_COUNTS)):
+        ref = bench_fire_sequence(False, dims, counts)
+        new = bench_fire_sequence(True, dims, counts)
+        label = f"batch {dims[0]}x{dims[1]}x{dims[2]}"
+        print(f"  {label:22s} loop {ref*1e3:8.3f} ms   batch    {new*1e3:8.3f} ms"
+              f"   speedup x{ref/new:.1f}")
+    ref = bench_game_setup(None)
+    new = bench_game_setup(LayoutPool(size=1000, sample=True))
+    print(f"  {'Game() setup':22s} place{ref*1e3:8.3f} ms   pool     {new*1e3:8.3f} ms"
+          f"   speedup x{ref/new:.1f}")
+    count, ref, new = bench_piece_store(300)
+    print(f"  {'piece store':22s} sets {ref/count:8.1f} B/pc  table    {new/count:8.1f} B/pc"
+          f"   {count} pieces, x{ref/new:.1f} smaller")
+    for dims, counts in ((BIAS_DIMS, BIAS_COUNTS), (CROWDED_BIAS_DIMS, CROWDED_BIAS_COUNTS)):
+        print(f"Layout samplers ({dims[0]}x{dims[1]}x{dims[2]}, "
+              f"{sum(counts.values())} pieces; cell occupancy vs exact uniform)")
+        for sampler in ('fast', 'uniform'):
+            dev, noise, rate = bench_placement_bias(sampler, dims=dims, counts=counts)
+            print(f"  {sampler:8s} max deviation {dev:.4f} (1 sigma noise {noise:.4f})"
+                  f"   {rate:8.0f} boards/s")
+    print("Placement heatmap (JET, 10% blocked)")
+    for size in (20, 50, 200):
+        ref = bench_density(size, 'python')
+        new = bench_density(size, 'numpy')
+        print(f"  {size:3d}x{size:<3d}                python {ref*1e3:8.3f} ms   numpy {new*1e3:8.3f} ms"
+              f"   speedup x{ref/new:.1f}")
+    ref, ref_writes = bench_render('print')
+    new, new_writes = bench_render('buffered')
+    print(f"View rendering (3x50x50)\n  print per row {ref*1e3:8.3f} ms, {ref_writes:.0f} writes   "
+          f"buffered {new*1e3:8.3f} ms, {new_writes:.0f} write   speedup x{ref/new:.1f}")
+    ref = bench_branch('deepcopy')
+    new = bench_branch('snapshot')
+    print(f"Board branching ({BENCH_DIMS[0]}x{BENCH_DIMS[1]}x{BENCH_DIMS[2]}, copy + 10 shots)\n"
+          f"  deepcopy {ref*1e6:10.1f} us   snapshot/restore {new*1e6:8.1f} us   speedup x{ref/new:.0f}")
+    ref, _ = bench_posterior(False)
+    new, rate = bench_posterior(True)
+    print(f"Posterior sampling ({BENCH_DIMS[0]}x{BENCH_DIMS[1]}x{BENCH_DIMS[2]}, 500 samples per layer, per turn)\n"
+          f"  fresh {ref*1e3:8.2f} ms   reuse {new*1e3:8.2f} ms   speedup x{ref/new:.1f}"
+          f"   {rate:8.0f} layouts/s")
+    ref = bench_game_stats(False)
+    new = bench_game_stats(True)
+    print(f"Instrumentation (Game.fire_at per shot)\n  stats off {ref*1e9:8.0f} ns   "
+          f"stats on {new*1e9:8.0f} ns   overhead {new/ref - 1:+.0%} when on")
+    print("Game server (one event loop, 3x5x5 matches, random players over local TCP)")
+    for matches in (10, 100, 500):
+        elapsed = bench_server(matches)
+        print(f"  {matches:4d} concurrent matches   {elapsed*1e3:8.1f} ms   "
+              f"{matches/elapsed:8.1f} matches/s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the 3D Submarines Game hot paths.")
+    parser.add_argument('--suite', action='store_true',
+                        help="run the per-size regression suite instead of the comparisons")
+    parser.add_argument('--sizes', default=','.join(map(str, SUITE_SIZES)))
+    parser.add_argument('--densities', default=','.join(map(str, SUITE_DENSITIES)))
+    parser.add_argument('--json', help="write suite results to this file")
+    parser.add_argument('--compare', help="baseline JSON from an earlier --json run")
+    parser.add_argument('--threshold', type=float, default=SUITE_THRESHOLD,
+                        help="tolerated slowdown as a fraction (default: %(default)s)")
+    args = parser.parse_args()
+    if args.suite:
+        sys.exit(suite_main(args))
+    main()
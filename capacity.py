@@ -0,0 +1,266 @@
+"""
+Packing capacities for 3D Submarines Game layers.
+- How many copies of a 2D shape (in any of its rotations) fit without
+  overlap on a rows x cols layer
+- Straight pieces use the closed form for 1 x k bars; other shapes are solved
+  exactly by a row-by-row profile search while the layer's narrow side is at
+  most EXACT_WIDTH, and bounded by tiling exactly solved blocks beyond that
+- packing() returns a witness: that many copies, laid out
+- Results are memoized per (rows, cols, shape)
+"""
+from functools import lru_cache
+from math import isqrt
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# A shape is the set of its normalized rotations
+Shape = FrozenSet[FrozenSet[Tuple[int,int]]]
+# A packing lists each copy's (x, y) cells, ascending
+Packing = Tuple[Tuple[Tuple[int,int], ...], ...]
+
+# Widest layer side the exact profile search is run on
+EXACT_WIDTH = 10
+# Longest side of the exact blocks tiled to bound wider layers
+BLOCK_LENGTH = 3 * EXACT_WIDTH
+
+
+def shape_key(rotations: Iterable[Set[Tuple[int,int]]]) -> Shape:
+    """Hashable key for a list of rotations as stored in _SHAPES_2D."""
+    return frozenset(frozenset(r) for r in rotations)
+
+
+def capacity_bounds(rows: int, cols: int,
+                    rotations: Iterable[Set[Tuple[int,int]]]) -> Tuple[int, int]:
+    """
+    (lower, upper) bounds on the number of non-overlapping copies of a shape
+    on a rows x cols layer. Both equal the true maximum for straight pieces
+    and for layers with a side of at most EXACT_WIDTH.
+    rotations must be closed under 90° rotation (as _get_rotations produces),
+    which makes rows x cols and cols x rows equivalent.
+    """
+    if rows < cols:
+        rows, cols = cols, rows
+    return _bounds(rows, cols, shape_key(rotations))
+
+
+def max_pieces(rows: int, cols: int, rotations: Iterable[Set[Tuple[int,int]]]) -> int:
+    """
+    Maximum number of non-overlapping copies of a shape on a rows x cols layer.
+    Raises ValueError where only bounds are known (see capacity_bounds).
+    """
+    lower, upper = capacity_bounds(rows, cols, rotations)
+    if lower != upper:
+        raise ValueError(f"No exact capacity for a {rows}×{cols} layer; "
+                         f"it lies between {lower} and {upper}")
+    return lower
+
+
+def packing(rows: int, cols: int, rotations: Iterable[Set[Tuple[int,int]]]) -> Packing:
+    """
+    capacity_bounds(rows, cols, rotations)[0] non-overlapping copies of a
+    shape on a rows x cols layer (x < cols, y < rows), each as its cells.
+    Straight pieces are laid out by the closed form; the exact search is
+    traced back for a layout, which takes about twice as long as the count.
+    """
+    return _packing(rows, cols, shape_key(rotations))
+
+
+@lru_cache(maxsize=16)
+def _packing(rows: int, cols: int, shape: Shape) -> Packing:
+    if rows < cols:
+        # turn a packing of the cols x rows layer by 90°: (x, y) -> (y, rows-1-x)
+        return tuple(tuple(sorted((y, rows - 1 - x) for x, y in piece))
+                     for piece in _packing(cols, rows, shape))
+    length = _line_length(shape)
+    if length:
+        pieces = _bar_packing(cols, rows, length)
+    elif cols <= EXACT_WIDTH:
+        pieces = [[(c % cols, c // cols) for c in _bits(mask)]
+                  for mask in _exact_packing(rows, cols, shape)]
+    else:
+        # the blocks _bounds tiles the layer with
+        pieces = []
+        for y in range(0, rows, BLOCK_LENGTH):
+            for x in range(0, cols, EXACT_WIDTH):
+                h, w = min(BLOCK_LENGTH, rows - y), min(EXACT_WIDTH, cols - x)
+                pieces.extend([(x + dx, y + dy) for dx, dy in piece]
+                              for piece in _packing(h, w, shape))
+    return tuple(tuple(sorted(piece)) for piece in pieces)
+
+
+@lru_cache(maxsize=None)
+def _bounds(rows: int, cols: int, shape: Shape) -> Tuple[int, int]:
+    # rows >= cols from here on: cols is the narrow side
+    length = _line_length(shape)
+    if length:
+        n = _max_bars(cols, rows, length)
+        return n, n
+    if cols <= EXACT_WIDTH:
+        n = _exact(rows, cols, shape)
+        return n, n
+    # tile the layer with exactly solved blocks for a lower bound
+    lower = 0
+    for y in range(0, rows, BLOCK_LENGTH):
+        for x in range(0, cols, EXACT_WIDTH):
+            block = (min(BLOCK_LENGTH, rows - y), min(EXACT_WIDTH, cols - x))
+            lower += _bounds(max(block), min(block), shape)[0]
+    size = len(next(iter(shape)))
+    return lower, max(lower, rows * cols // size)
+
+
+def _line_length(shape: Shape) -> int:
+    """Length of a straight 1 x k shape, or 0 for any other shape."""
+    for rot in shape:
+        if all(y == 0 for x, y in rot):
+            k = len(rot)
+            if {x for x, y in rot} == set(range(k)):
+                return k
+    return 0
+
+
+def _max_bars(short: int, long: int, k: int) -> int:
+    """
+    Maximum number of 1 x k bars in a short x long rectangle.
+    With short = a*k + r and long = b*k + s, at least min(r*s, (k-r)*(k-s))
+    cells are always left uncovered, and that bound is reached.
+    """
+    if long < k:
+        return 0
+    if short < k:
+        return short * (long // k)
+    r, s = short % k, long % k
+    return (short * long - min(r * s, (k - r) * (k - s))) // k
+
+
+def _bar_packing(short: int, long: int, k: int) -> List[List[Tuple[int, int]]]:
+    """
+    _max_bars(short, long, k) bars laid out in a short x long rectangle, as
+    (x, y) cells with x < short and y < long.
+    Either the r x s corner is left empty (bars along y, then across the
+    last s rows), or the (k-r) x (k-s) hole of a pinwheel: four rectangles
+    around it, each with a side that is a multiple of k.
+    """
+    bars: List[List[Tuple[int, int]]] = []
+    def fill(x0, y0, w, h, along_y):
+        # w x h rectangle at (x0, y0) with bars along y (or x), as many as fit
+        if along_y:
+            for x in range(x0, x0 + w):
+                for y in range(y0, y0 + h - k + 1, k):
+                    bars.append([(x, y + i) for i in range(k)])
+        else:
+            for y in range(y0, y0 + h):
+                for x in range(x0, x0 + w - k + 1, k):
+                    bars.append([(x + i, y) for i in range(k)])
+    if long < k:
+        return bars
+    r, s = short % k, long % k
+    if short < k or r * s <= (k - r) * (k - s):
+        fill(0, 0, short, long - s, True)
+        fill(0, long - s, short, s, False)
+    else:
+        # the hole spans x in [r, k) and y in [s, k)
+        fill(0, 0, k, s, False)
+        fill(0, s, r, long - s, True)
+        fill(r, k, short - r, long - k, False)
+        fill(k, 0, short - k, k, True)
+    return bars
+
+
+def _exact(rows: int, cols: int, shape: Shape) -> int:
+    """
+    Exact maximum by dynamic programming over cells in row-major order.
+    The state is the occupancy of the cells from the current one onwards,
+    which spans only a few rows, so the state count grows with cols, not rows.
+    """
+    starts = _starts(rows, cols, shape)
+    # profile (bit 0 = current cell) -> most pieces placed so far
+    states: Dict[int, int] = {0: 0}
+    for cell in range(rows * cols):
+        states = _step(states, starts.get(cell, ()))
+    return max(states.values())
+
+
+def _exact_packing(rows: int, cols: int, shape: Shape) -> List[int]:
+    """
+    A maximum packing from _exact's dynamic programming, as layer bitmasks.
+    The states are kept only at every few cells; each stretch between two is
+    recomputed while tracing back from the best final state, so memory grows
+    with the square root of the layer, not the layer.
+    """
+    layer = rows * cols
+    starts = _starts(rows, cols, shape)
+    every = isqrt(layer) + 1
+    kept: Dict[int, Dict[int, int]] = {}
+    states: Dict[int, int] = {0: 0}
+    for cell in range(layer):
+        if cell % every == 0:
+            kept[cell] = states
+        states = _step(states, starts.get(cell, ()))
+    key = max(states, key=states.get)
+    placed = states[key]
+    masks: List[int] = []
+    for first in sorted(kept, reverse=True):
+        stretch = [kept[first]]
+        for cell in range(first, min(first + every, layer) - 1):
+            stretch.append(_step(stretch[-1], starts.get(cell, ())))
+        for cell in range(min(first + every, layer) - 1, first - 1, -1):
+            # a profile at cell that leads to key with placed pieces
+            before = stretch[cell - first]
+            full = key << 1 | 1
+            for profile in (key << 1, full):
+                if before.get(profile) == placed:
+                    break
+            else:
+                for mask in starts.get(cell, ()):
+                    profile = full ^ mask
+                    if not mask & ~full and before.get(profile) == placed - 1:
+                        masks.append(mask << cell)
+                        placed -= 1
+                        break
+                else:
+                    raise AssertionError("no predecessor state")
+            key = profile
+    return masks
+
+
+def _starts(rows: int, cols: int, shape: Shape) -> Dict[int, List[int]]:
+    """Per cell, the masks of the placements starting there, shifted down to it."""
+    starts: Dict[int, List[int]] = {}
+    for rot in shape:
+        max_dx = max(x for x, y in rot)
+        max_dy = max(y for x, y in rot)
+        for y0 in range(rows - max_dy):
+            for x0 in range(cols - max_dx):
+                mask = 0
+                for x, y in rot:
+                    mask |= 1 << ((y0 + y) * cols + x0 + x)
+                low = (mask & -mask).bit_length() - 1
+                starts.setdefault(low, []).append(mask >> low)
+    return starts
+
+
+def _step(states: Dict[int, int], options: Iterable[int]) -> Dict[int, int]:
+    """_exact's states after one more cell, given the placements starting there."""
+    nxt: Dict[int, int] = {}
+    for profile, placed in states.items():
+        # leave the cell as it is (empty, or covered by an earlier piece)
+        key = profile >> 1
+        if nxt.get(key, -1) < placed:
+            nxt[key] = placed
+        if profile & 1:
+            continue
+        for mask in options:
+            if not mask & profile:
+                key = (profile | mask) >> 1
+                if nxt.get(key, -1) <= placed:
+                    nxt[key] = placed + 1
+    return nxt
+
+
+def _bits(mask: int) -> List[int]:
+    """Indices of the set bits of mask, ascending."""
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
@@ -0,0 +1,71 @@
+"""
+NumPy placement-count heatmaps for large 3D Submarines Game boards.
+- For each layer, counts how many legal placements of the layer's vessel
+  type cover each cell, given the cells that are ruled out (misses, kills)
+- Each rotation in _SHAPES_2D is slid across the layer as whole-array
+  operations: one AND per shape cell to find the valid anchors, one add per
+  shape cell to spread them back onto the cells they cover
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+from main import PieceType, Signal, _ROTATIONS, _layer_of
+
+
+def placement_density(blocked: np.ndarray, ptype: PieceType,
+                      hits: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Number of placements of ptype covering each cell of one layer.
+    - blocked: bool (rows, cols) array of cells no placement may cover
+    - hits: optional bool (rows, cols) array of damaged cells; a placement
+      covering k of them is counted 1 + k*k times instead of once
+    Returns an int64 (rows, cols) array.
+    """
+    rows, cols = blocked.shape
+    free = ~blocked
+    density = np.zeros((rows, cols), dtype=np.int64)
+    for rot in _ROTATIONS[ptype]:
+        ar, ac = rows - rot.height + 1, cols - rot.width + 1
+        if ar <= 0 or ac <= 0:
+            continue
+        valid = np.ones((ar, ac), dtype=bool)
+        for x, y in rot.offsets:
+            valid &= free[y:y + ar, x:x + ac]
+        weight = valid.astype(np.int64)
+        if hits is not None:
+            covered = np.zeros((ar, ac), dtype=np.int64)
+            for x, y in rot.offsets:
+                covered += hits[y:y + ar, x:x + ac]
+            weight *= 1 + covered * covered
+        for x, y in rot.offsets:
+            density[y:y + ar, x:x + ac] += weight
+    return density
+
+
+def board_density(depth: int, rows: int, cols: int,
+                  counts: Dict[PieceType, int],
+                  ledger: Dict[int, Signal]) -> np.ndarray:
+    """
+    (depth, rows, cols) heatmap of one player's view of the opponent board.
+    ledger maps bit indices to shot results, as in Game.ledger: misses and
+    kills block placements, hits weight the placements through them. Each
+    layer's counts are multiplied by the pieces of its type in counts.
+    """
+    shape = (depth, rows, cols)
+    blocked = np.zeros(depth * rows * cols, dtype=bool)
+    hits = np.zeros(depth * rows * cols, dtype=bool)
+    if ledger:
+        idx = np.fromiter(ledger.keys(), dtype=np.int64, count=len(ledger))
+        sig = np.fromiter((s.value for s in ledger.values()), dtype=np.int64, count=len(ledger))
+        blocked[idx[sig != Signal.HIT.value]] = True
+        hits[idx[sig == Signal.HIT.value]] = True
+    blocked, hits = blocked.reshape(shape), hits.reshape(shape)
+
+    density = np.zeros(shape, dtype=np.int64)
+    for ptype, num in counts.items():
+        z = _layer_of(ptype)
+        if ptype is PieceType.GENERAL or not num or z >= depth:
+            continue
+        density[z] += num * placement_density(blocked[z], ptype, hits[z])
+    return density
@@ -0,0 +1,154 @@
+"""
+Pre-generated piece layouts for fast Board3D construction.
+- Layouts are produced by Board3D.place_all on a background thread, one pool
+  per (depth, rows, cols, counts) configuration
+- Handing one out is a pop (or a random pick) plus Board3D.apply_layout, with
+  no packing search on the caller's side
+- Configurations are evicted least recently used first
+"""
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from main import PieceType, Board3D, Game
+
+# Pool key: (depth, rows, cols, ((PieceType value, count), ...))
+Key = Tuple[int, int, int, Tuple[Tuple[int, int], ...]]
+Layout = Tuple[Tuple[PieceType, Tuple[int, ...]], ...]
+
+
+def _key(depth: int, rows: int, cols: int, counts: Dict[PieceType, int]) -> Key:
+    return depth, rows, cols, tuple(sorted((p.value, n) for p, n in counts.items() if n))
+
+
+def _generate(key: Key, seed: int) -> Layout:
+    depth, rows, cols, counts = key
+    board = Board3D(depth, rows, cols, rng=seed)
+    board.place_all({PieceType(v): n for v, n in counts})
+    return board.layout()
+
+
+class LayoutPool:
+    """
+    Cache of ready-made layouts, refilled in the background.
+    - size: layouts kept per configuration
+    - max_configs: configurations kept before the least recently used is dropped
+    - sample: if True, keep size layouts per configuration and hand out a
+      uniform random pick among them (layouts repeat across boards); if False,
+      each layout is handed out once and replaced
+    - seed: seeds the generator the layout seeds are drawn from
+    A configuration is registered by its first request, which is placed
+    synchronously (and raises ValueError for counts place_all rejects), as is
+    any request that finds its pool empty.
+    """
+    def __init__(self, size: int = 64, max_configs: int = 8,
+                 sample: bool = False, seed: Optional[int] = None):
+        self.size = size
+        self.max_configs = max_configs
+        self.sample = sample
+        self.hits = 0    # requests served from a pool
+        self.misses = 0  # requests placed synchronously
+        self._rng = random.Random(seed)
+        self._pools: 'OrderedDict[Key, List[Layout]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._wanted = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def layout(self, depth: int, rows: int, cols: int,
+               counts: Dict[PieceType, int]) -> Layout:
+        """One board's layout for the configuration, as Board3D.layout() returns."""
+        key = _key(depth, rows, cols, counts)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool:
+                self.hits += 1
+                self._pools.move_to_end(key)
+                if self.sample:
+                    return self._rng.choice(pool)
+                self._wanted.notify()
+                return pool.pop()
+            self.misses += 1
+            seed = self._rng.getrandbits(63)
+        layout = _generate(key, seed)
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = []
+                while len(self._pools) > self.max_configs:
+                    self._pools.popitem(last=False)
+            self._pools.move_to_end(key)
+            self._wanted.notify()
+        self._start()
+        return layout
+
+    def board(self, depth: int, rows: int, cols: int,
+              counts: Dict[PieceType, int]) -> Board3D:
+        """A Board3D with the configuration's pieces already placed."""
+        board = Board3D(depth, rows, cols)
+        board.apply_layout(self.layout(depth, rows, cols, counts))
+        return board
+
+    def game(self, depth: int, rows: int, cols: int,
+             counts: Dict[PieceType, int]) -> Game:
+        """A Game whose two boards come from the pool."""
+        layouts = (self.layout(depth, rows, cols, counts),
+                   self.layout(depth, rows, cols, counts))
+        return Game(depth, rows, cols, counts, layouts=layouts)
+
+    def warm(self, depth: int, rows: int, cols: int, counts: Dict[PieceType, int]):
+        """Fill the configuration's pool synchronously, e.g. before serving."""
+        key = _key(depth, rows, cols, counts)
+        self.layout(depth, rows, cols, counts)
+        while True:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None or len(pool) >= self.size:
+                    return
+                seed = self._rng.getrandbits(63)
+            layout = _generate(key, seed)
+            with self._lock:
+                if len(pool) < self.size:
+                    pool.append(layout)
+
+    def pending(self, depth: int, rows: int, cols: int, counts: Dict[PieceType, int]) -> int:
+        """Layouts currently held for the configuration."""
+        with self._lock:
+            return len(self._pools.get(_key(depth, rows, cols, counts), ()))
+
+    def close(self):
+        """Stop the background thread."""
+        with self._lock:
+            self._closed = True
+            self._wanted.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._fill, daemon=True,
+                                                name='layout-pool')
+                self._thread.start()
+
+    def _hungry(self) -> Optional[Key]:
+        """Most recently used configuration whose pool is not full."""
+        for key, pool in reversed(self._pools.items()):
+            if len(pool) < self.size:
+                return key
+        return None
+
+    def _fill(self):
+        """Background loop: top up pools, most recently used first."""
+        while True:
+            with self._wanted:
+                while not self._closed and (key := self._hungry()) is None:
+                    self._wanted.wait()
+                if self._closed:
+                    return
+                seed = self._rng.getrandbits(63)
+            layout = _generate(key, seed)
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is not None and len(pool) < self.size:
+                    pool.append(layout)
@@ -5,9 +5,18 @@
 - Extensibilty supported via easy addition new PieceTypes and shapes in _SHAPES_2D
 """
 import random
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping, Sequence
 from enum import Enum, auto
-from dataclasses import dataclass
-from typing import Tuple, Set, Dict, List
+from functools import lru_cache
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Tuple, Set, FrozenSet, Dict, Iterable, List, Optional
+
+from capacity import capacity_bounds, packing
+from render import Renderer, TextRenderer
+from stats import GameStats
 
 # Alias for a 3D coordinate: (x, y, depth)
 Coordinate = Tuple[int, int, int]
@@ -40,6 +49,23 @@ def _get_rotations(base: List[Tuple[int,int]]) -> List[Set[Tuple[int,int]]]:
         current = [(y, -x) for x,y in current]
     return configs
 
+def _as_random(rng):
+    """
+    Normalize an injected generator for placement.
+    Accepts None (the module-level random generator), an int seed, a
+    random.Random, or a NumPy Generator (which seeds a random.Random from
+    its own stream, so the result is still reproducible from its seed).
+    """
+    if rng is None:
+        return random  # module-level functions share one hidden Random
+    if isinstance(rng, int):
+        return random.Random(rng)
+    if isinstance(rng, random.Random):
+        return rng
+    if hasattr(rng, 'integers'):
+        return random.Random(int(rng.integers(1 << 63)))
+    raise TypeError(f"Unsupported random generator: {type(rng).__name__}")
+
 ### Define classes ###
 
 class Signal(Enum):
@@ -53,6 +79,15 @@ class Signal(Enum):
     HIT  = auto()
     KILL = auto()
 
+class WinCondition(Enum):
+    """
+    How a match was won.
+    GENERAL_DOWN: the opponent's General was hit
+    FLEET_ELIMINATED: all of the opponent's non-General vessels were sunk
+    """
+    GENERAL_DOWN     = auto()
+    FLEET_ELIMINATED = auto()
+
 class PieceType(Enum):
     """
     Different vessel types in the game.
@@ -66,6 +101,10 @@ class PieceType(Enum):
     JET       = auto()
     GENERAL   = auto()
 
+    # members are singletons compared by identity: hash them the same way,
+    # in C, rather than by Enum's Python-level hash of the name
+    __hash__ = object.__hash__
+
 # Define PieceTypes and piece shapes
 _SHAPES_2D: Dict[PieceType, List[Set[Tuple[int,int]]]] = {
     PieceType.SUBMARINE: _get_rotations([(0,0), (1,0), (2,0)]),
@@ -74,130 +113,1201 @@ _SHAPES_2D: Dict[PieceType, List[Set[Tuple[int,int]]]] = {
     PieceType.GENERAL: [_normalize([(0,0)])]
 }
 
+def _layer_of(ptype: PieceType) -> int:
+    """Fixed depth layer of a vessel type (the General has none and returns -1)."""
+    return -1 if ptype is PieceType.GENERAL else ptype.value - 1
+
+@lru_cache(maxsize=None)
+def _symmetric(ptype: PieceType, swap: bool, fx: bool, fy: bool) -> bool:
+    """
+    Whether transposing (if swap) then mirroring x (fx) and y (fy) maps
+    every rotation of ptype's shape to another of its rotations.
+    """
+    shapes = {frozenset(shape) for shape in _SHAPES_2D[ptype]}
+    for shape in shapes:
+        moved = [(y, x) if swap else (x, y) for x, y in shape]
+        moved = [(-x if fx else x, -y if fy else y) for x, y in moved]
+        if frozenset(_normalize(moved)) not in shapes:
+            return False
+    return True
+
+
+@dataclass(frozen=True)
+class Rotation:
+    """
+    One rotation of a piece shape, compiled for placement.
+    - offsets: (x, y) cells relative to the anchor (the bounding box's corner)
+    - width, height: bounding box size
+    """
+    offsets: Tuple[Tuple[int,int], ...]
+    width: int
+    height: int
+
+    @classmethod
+    def compile(cls, shape: Set[Tuple[int,int]]) -> 'Rotation':
+        offsets = tuple(sorted(shape, key=lambda c: (c[1], c[0])))
+        return cls(offsets,
+                   max(x for x,y in offsets) + 1,
+                   max(y for x,y in offsets) + 1)
+
+    def flat_offsets(self, cols: int) -> Tuple[int, ...]:
+        """Offsets as cell-index deltas on a layer cols wide, in ascending order."""
+        return tuple(y * cols + x for x,y in self.offsets)
+
+# Compiled registry: each PieceType's rotations from _SHAPES_2D
+_ROTATIONS: Dict[PieceType, Tuple[Rotation, ...]] = {
+    ptype: tuple(Rotation.compile(shape) for shape in shapes)
+    for ptype, shapes in _SHAPES_2D.items()
+}
+
+
+class _Placements(Sequence):
+    """Read-only sequence of n items, each computed by get(i) on access."""
+    __slots__ = ('_get', '_n')
+
+    def __init__(self, get, n: int):
+        self._get, self._n = get, n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._get(j) for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._get(i)
+
+    def __iter__(self):
+        return map(self._get, range(self._n))
+
+
+class ShapeTable:
+    """
+    Every legal placement of one piece type on an empty rows x cols layer,
+    over all rotations and anchors, numbered rotation by rotation and then in
+    anchor order. Placement i has:
+    - anchors[i]: (rotation index, anchor cell index y*cols + x)
+    - cells[i]: its layer cell indices, ascending
+    - masks[i]: the same cells as a layer bitmask
+    Plus covering (per cell, the ids of the placements covering it) and
+    starting_at(c) (ids of the placements whose lowest cell is c).
+    Only each rotation's shape mask and cell deltas are stored: anchors and
+    masks decode placements on access, so the placement search costs no
+    memory per placement. cells and covering, which the AIs read over and
+    over, are built in full on first use and kept.
+    Built once per (ptype, rows, cols) by shape_table().
+    """
+    __slots__ = ('ptype', 'rows', 'cols', 'anchors', 'masks',
+                 '_first', '_spans', '_deltas', '_shapes', '_cells', '_covering')
+
+    def __init__(self, ptype: PieceType, rows: int, cols: int):
+        self.ptype, self.rows, self.cols = ptype, rows, cols
+        # per rotation: id of its first placement, anchors per row and rows
+        # of anchors, cell deltas from the anchor, and mask at anchor 0
+        self._first, self._spans, self._deltas, self._shapes = [], [], [], []
+        total = 0
+        for rot in _ROTATIONS[ptype]:
+            nx, ny = max(cols - rot.width + 1, 0), max(rows - rot.height + 1, 0)
+            deltas = rot.flat_offsets(cols)
+            self._first.append(total)
+            self._spans.append((nx, ny))
+            self._deltas.append(deltas)
+            self._shapes.append(sum(1 << d for d in deltas))
+            total += nx * ny
+        self.anchors = _Placements(self.anchor, total)
+        self.masks = _Placements(self.mask, total)
+        self._cells: Optional[Tuple[Tuple[int, ...], ...]] = None
+        self._covering: Optional[Tuple[Tuple[int, ...], ...]] = None
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    @property
+    def cells(self) -> Tuple[Tuple[int, ...], ...]:
+        """Layer cell indices of every placement, ascending."""
+        if self._cells is None:
+            self._cells = tuple(map(self.cells_of, range(len(self))))
+        return self._cells
+
+    @property
+    def covering(self) -> Tuple[Tuple[int, ...], ...]:
+        """Per layer cell, the ids of the placements covering it, ascending."""
+        if self._covering is None:
+            covering: List[List[int]] = [[] for _ in range(self.rows * self.cols)]
+            for i, placed in enumerate(self.cells):
+                for c in placed:
+                    covering[c].append(i)
+            self._covering = tuple(map(tuple, covering))
+        return self._covering
+
+    def anchor(self, i: int) -> Tuple[int, int]:
+        """(rotation index, anchor cell index) of placement i."""
+        r = bisect_right(self._first, i) - 1
+        y0, x0 = divmod(i - self._first[r], self._spans[r][0])
+        return r, y0 * self.cols + x0
+
+    def mask(self, i: int) -> int:
+        """Layer bitmask of placement i."""
+        r, anchor = self.anchor(i)
+        return self._shapes[r] << anchor
+
+    def cells_of(self, i: int) -> Tuple[int, ...]:
+        """Layer cell indices of placement i, ascending."""
+        r, anchor = self.anchor(i)
+        return tuple(anchor + d for d in self._deltas[r])
+
+    def placement(self, cells: Sequence[int]) -> int:
+        """Id of the placement covering exactly cells, given ascending."""
+        cells = tuple(cells)
+        return next(i for i in self.starting_at(cells[0]) if self.cells_of(i) == cells)
+
+    def starting_at(self, c: int) -> Tuple[int, ...]:
+        """Ids of the placements whose lowest cell is c, ascending."""
+        out = []
+        for r, deltas in enumerate(self._deltas):
+            nx, ny = self._spans[r]
+            if c >= deltas[0]:
+                y0, x0 = divmod(c - deltas[0], self.cols)
+                if y0 < ny and x0 < nx:
+                    out.append(self._first[r] + y0 * nx + x0)
+        return tuple(out)
+
+
+@lru_cache(maxsize=64)
+def shape_table(ptype: PieceType, rows: int, cols: int) -> ShapeTable:
+    """Cached ShapeTable of ptype for a rows x cols layer."""
+    return ShapeTable(ptype, rows, cols)
+
+# Layout samplers accepted by Board3D.place_all
+SAMPLERS = ('fast', 'uniform')
+# Moves per piece the uniform sampler makes from its packed starting layout
+UNIFORM_SWEEPS = 64
+# Free cells, counting two lifted pieces, up to which the uniform sampler
+# also moves pieces in pairs, once per sweep (crowded layers only: the
+# pair's options are listed in full)
+UNIFORM_PAIR_FREE = 16
+# Dead ends per piece after which _pack_layer gives a layer up to the
+# exhaustive _cover_layer: packs that succeed almost never hit one, while
+# retrying a crowded layer costs more than covering it outright
+PACK_RETRY_RATE = 0.1
+# ...but never fewer than this many dead ends, or layers of under ten pieces
+# would give up on the first one
+PACK_MIN_DEAD_ENDS = 4
+# Random placements _place_random tests before listing every free one
+PLACE_DRAWS = 32
+# _cover_layer's walks that leave cells empty at random, and the options per
+# piece each may try before giving up
+COVER_RESTARTS = 8
+COVER_RESTART_RATE = 64
+# Options _cover_layer's final, exhaustive walk may try before place_all
+# gives up with a PlacementError (a few seconds)
+COVER_BUDGET = 1 << 20
+
+
 @dataclass
+class PlacementReport:
+    """
+    How Board3D.place_all went, kept as Board3D.placement.
+    - attempts: (piece type, placements tested) per piece, in placement
+      order, tests repeated after backtracking included; pieces of layers
+      placed by _cover_layer are counted in cover_attempts instead
+    - dead_ends: _pack_layer dead ends per layer
+    - exhaustive: layers placed by _cover_layer
+    - cover_attempts: placements _cover_layer tried per layer
+    - demand: fraction of each layer's cells its fleet needs, cells of
+      pieces already on the board included
+    - fill: fraction of each layer's cells covered (at failure: so far)
+    - free_anchors: free placements left per piece type on its layer (any
+      layer for the General); only filled in when placement fails
+    - error: why placement failed, or None
+    """
+    attempts: List[Tuple[PieceType, int]] = field(default_factory=list)
+    dead_ends: Dict[int, int] = field(default_factory=dict)
+    exhaustive: List[int] = field(default_factory=list)
+    cover_attempts: Dict[int, int] = field(default_factory=dict)
+    demand: Dict[int, float] = field(default_factory=dict)
+    fill: Dict[int, float] = field(default_factory=dict)
+    free_anchors: Dict[PieceType, int] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def describe(self) -> str:
+        """One-line summary of fill, demand and free anchors per layer/type."""
+        parts = [f"layer {z}: {self.fill.get(z, 0.0):.0%} filled of {d:.0%} needed"
+                 for z, d in sorted(self.demand.items())]
+        if self.free_anchors:
+            parts.append("free anchors " + ", ".join(
+                f"{p.name.lower()} {n}" for p, n in self.free_anchors.items()))
+        return "; ".join(parts)
+
+
+class PlacementError(RuntimeError):
+    """place_all failure, carrying the board's PlacementReport as .report."""
+    def __init__(self, message: str, report: PlacementReport):
+        super().__init__(message)
+        self.report = report
+
+# Types that are destroyed by a single hit
+_SINGLE_HIT = frozenset((PieceType.SUBMARINE, PieceType.JET, PieceType.GENERAL))
+
+# PieceType per type code stored in a PieceTable, and the single-hit codes
+_PIECE_TYPES: Tuple[PieceType, ...] = tuple(PieceType)
+_TYPE_CODE: Dict[PieceType, int] = {p: i for i, p in enumerate(_PIECE_TYPES)}
+_SINGLE_HIT_CODES = frozenset(_TYPE_CODE[p] for p in _SINGLE_HIT)
+
+class PieceTable:
+    """
+    Struct-of-arrays store of a board's pieces, indexed by piece id.
+    - types: type code per piece (index into _PIECE_TYPES)
+    - start: piece i covers cells[start[i]:start[i+1]]
+    - cells: flat cell indices of all pieces, each piece's run ordered as
+      sorted(coords) (its slots)
+    - hit: per entry of cells, 1 once that cell has been hit
+    - remaining: per piece, cells not hit yet
+    - live, afloat: pieces not sunk, per type and in total excluding the
+      General; updated once per piece, on the hit that sinks it
+    - board: the Board3D owning the table, if any; Piece.register_hit fires
+      through it so that the board's hit_mask stays in step
+    Indexing or iterating yields Piece views; nothing per piece is allocated
+    until a view is asked for.
+    """
+    __slots__ = ('rows', 'cols', 'types', 'start', 'cells', 'hit', 'remaining',
+                 'live', 'afloat', 'board')
+
+    def __init__(self, rows: int, cols: int):
+        self.rows, self.cols = rows, cols
+        self.types = array('B')
+        self.start = array('I', [0])
+        self.cells = array('I')
+        self.hit = bytearray()
+        self.remaining = array('H')
+        self.live: Dict[PieceType, int] = {ptype: 0 for ptype in PieceType}
+        self.afloat = 0
+        self.board: Optional['Board3D'] = None
+
+    def add(self, ptype: PieceType, cells: Iterable[int]) -> int:
+        """Append a piece over cells (in slot order) and return its id."""
+        pid = len(self.types)
+        self.types.append(_TYPE_CODE[ptype])
+        before = len(self.cells)
+        self.cells.extend(cells)
+        self.start.append(len(self.cells))
+        self.hit.extend(bytes(len(self.cells) - before))
+        self.remaining.append(len(self.cells) - before)
+        self.live[ptype] += 1
+        if ptype is not PieceType.GENERAL:
+            self.afloat += 1
+        return pid
+
+    def hit_slot(self, pid: int, pos: int) -> Signal:
+        """Register a hit on entry pos of cells, part of piece pid."""
+        if not self.hit[pos]:
+            was_sunk = self.is_sunk(pid)
+            self.hit[pos] = 1
+            self.remaining[pid] -= 1
+            if not was_sunk and self.is_sunk(pid):
+                self._sunk(pid)
+        if self.types[pid] in _SINGLE_HIT_CODES or not self.remaining[pid]:
+            return Signal.KILL
+        return Signal.HIT
+
+    def _sunk(self, pid: int):
+        """Drop piece pid from the live counts, once, as it sinks."""
+        ptype = _PIECE_TYPES[self.types[pid]]
+        self.live[ptype] -= 1
+        if ptype is not PieceType.GENERAL:
+            self.afloat -= 1
+
+    def is_sunk(self, pid: int) -> bool:
+        # for single‐hit types, any hit means sunk:
+        if self.types[pid] in _SINGLE_HIT_CODES:
+            return self.remaining[pid] < self.start[pid + 1] - self.start[pid]
+        # for multi‐hit types, require every cell:
+        return not self.remaining[pid]
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, pid: int) -> 'Piece':
+        if not -len(self.types) <= pid < len(self.types):
+            raise IndexError(pid)
+        return Piece(self, pid % len(self.types))
+
+    def __iter__(self):
+        return (Piece(self, pid) for pid in range(len(self.types)))
+
 class Piece:
     """
-    Represents a single vessel on the board.
+    Represents a single vessel on the board: a view of one PieceTable entry.
     - piece_type: type of vessel
+    - cells: flat cell indices, in slot order
     - coords: set of occupied 3D coordinates
-    - hits: subset of coords that have been hit
+    - hit_bits: bit i is set once the i-th of sorted(coords) has been hit
+    - remaining: number of coords not hit yet
+    Views of the same entry compare equal.
     """
-    piece_type: PieceType
-    coords: Set[Coordinate]
-    hits: Set[Coordinate]
+    __slots__ = ('table', 'id')
+
+    def __init__(self, table: PieceTable, pid: int):
+        self.table = table
+        self.id = pid
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, Piece)
+                and self.table is other.table and self.id == other.id)
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.id))
+
+    def __repr__(self) -> str:
+        return f"Piece({self.piece_type.name}, id={self.id})"
+
+    @property
+    def piece_type(self) -> PieceType:
+        return _PIECE_TYPES[self.table.types[self.id]]
+
+    @property
+    def cells(self) -> Tuple[int, ...]:
+        t = self.table
+        return tuple(t.cells[t.start[self.id]:t.start[self.id + 1]])
+
+    @property
+    def coords(self) -> FrozenSet[Coordinate]:
+        layer, cols = self.table.rows * self.table.cols, self.table.cols
+        coords = set()
+        for i in self.cells:
+            z, rem = divmod(i, layer)
+            y, x = divmod(rem, cols)
+            coords.add((x, y, z))
+        return frozenset(coords)
+
+    @property
+    def hit_bits(self) -> int:
+        t = self.table
+        first = t.start[self.id]
+        return sum(t.hit[first + k] << k for k in range(t.start[self.id + 1] - first))
+
+    @property
+    def remaining(self) -> int:
+        return self.table.remaining[self.id]
+
+    @property
+    def hits(self) -> Set[Coordinate]:
+        """Subset of coords that have been hit."""
+        return {c for i, c in enumerate(sorted(self.coords)) if self.hit_bits >> i & 1}
 
     def register_hit(self, coord: Coordinate) -> Signal:
-        if coord not in self.coords:
+        """
+        Hit this piece at coord (MISS if it does not cover it). On a board,
+        the shot goes through Board3D.receive_fire_at, which also records
+        it in the board's hit_mask.
+        """
+        ordered = sorted(self.coords)
+        if coord not in ordered:
             return Signal.MISS
-        self.hits.add(coord)
-        if self.piece_type in (PieceType.SUBMARINE, PieceType.JET, PieceType.GENERAL):
-            return Signal.KILL
-        if self.hits == self.coords:
-            return Signal.KILL
-        return Signal.HIT
+        slot = self.table.start[self.id] + ordered.index(coord)
+        board = self.table.board
+        if board is not None:
+            return board.receive_fire_at(self.table.cells[slot])
+        return self.table.hit_slot(self.id, slot)
 
     def is_sunk(self) -> bool:
-        # for single‐hit types, any hit means sunk:
-        if self.piece_type in (PieceType.SUBMARINE, PieceType.JET, PieceType.GENERAL):
-            return bool(self.hits)
-        # for multi‐hit types, require every coord:
-        return self.hits == self.coords
+        return self.table.is_sunk(self.id)
+
+class OccupiedView(Mapping):
+    """
+    Read-only Coordinate -> Piece mapping over a board's piece_ids array,
+    for code written against the original occupied dict.
+    """
+    def __init__(self, board: 'Board3D'):
+        self._board = board
+
+    def __getitem__(self, coord: Coordinate) -> Piece:
+        board = self._board
+        x, y, z = coord
+        if 0 <= x < board.cols and 0 <= y < board.rows and 0 <= z < board.depth:
+            pid = board.piece_ids[board.index(coord)]
+            if pid >= 0:
+                return board.pieces[pid]
+        raise KeyError(coord)
+
+    def __iter__(self):
+        board = self._board
+        for idx, pid in enumerate(board.piece_ids):
+            if pid >= 0:
+                yield board.coord(idx)
+
+    def __len__(self) -> int:
+        return bin(self._board.occupancy).count('1')
 
 class Board3D:
     """
     3D game board: depth layers of rows x cols.
     Tracks piece placement and resolves incoming fire.
+    Cells are addressed by flat index (z*rows + y)*cols + x (see index() and
+    coord()); occupancy and hits are integer bitboards over those indices and
+    piece_ids holds each cell's index into pieces. The 'occupied' mapping is a
+    Coordinate-keyed view of piece_ids, kept for compatibility.
+    Random placement draws from rng (see _as_random; default: the module-level
+    random generator). Placement work is counted in stats, if given.
     """
-    def __init__(self, depth: int, rows: int, cols: int):
+    def __init__(self, depth: int, rows: int, cols: int, rng=None,
+                 stats: Optional[GameStats] = None):
         self.depth = depth
         self.rows = rows
         self.cols = cols
-        self.occupied: Dict[Coordinate, Piece] = {}
-        self.pieces: List[Piece] = []
+        self.rng = _as_random(rng)
+        self.stats = stats
+        # report of the last place_all, see PlacementReport
+        self.placement: Optional[PlacementReport] = None
+        self.pieces = PieceTable(rows, cols)
+        self.pieces.board = self
+        self.occupancy = 0   # cells covered by any piece
+        self.hit_mask = 0    # occupied cells that have been fired at
+        # index into pieces per cell, -1 where empty
+        self.piece_ids = array('i', [-1]) * (depth * rows * cols)
+        # position of each occupied cell in pieces.cells
+        self._pos = array('I', [0]) * (depth * rows * cols)
+        # Coordinate -> cell index of the occupied cells, so that the tuple
+        # path (receive_fire) costs one dict lookup per miss
+        self._cell_at: Dict[Coordinate, int] = {}
 
-    def place_all(self, counts: Dict[PieceType, int]):
+    @property
+    def live(self) -> Dict[PieceType, int]:
+        """Pieces not sunk yet, per type (kept by the PieceTable)."""
+        return self.pieces.live
+
+    @property
+    def _afloat(self) -> int:
+        """Pieces not sunk yet, excluding the General."""
+        return self.pieces.afloat
+
+    @property
+    def occupied(self) -> OccupiedView:
+        """Coordinate -> Piece view of the occupied cells."""
+        return OccupiedView(self)
+
+    def index(self, coord: Coordinate) -> int:
+        """Flat cell index of coord, also its bit in the board's bitboards."""
+        x, y, z = coord
+        return (z * self.rows + y) * self.cols + x
+
+    def coord(self, idx: int) -> Coordinate:
+        """Coordinate of flat cell index idx (inverse of index())."""
+        z, rem = divmod(idx, self.rows * self.cols)
+        y, x = divmod(rem, self.cols)
+        return (x, y, z)
+
+    def piece_at(self, idx: int) -> Optional[Piece]:
+        """Piece covering flat cell index idx, or None."""
+        pid = self.piece_ids[idx]
+        return self.pieces[pid] if pid >= 0 else None
+
+    def bit(self, coord: Coordinate) -> int:
+        """Single-bit mask of coord."""
+        x, y, z = coord
+        return 1 << ((z * self.rows + y) * self.cols + x)
+
+    def place_all(self, counts: Dict[PieceType, int], rng=None, sampler: str = 'fast'):
         """
-        Randomly place all vessels according to counts.
-        Strictly checks for exactly one General, and that no more than
-        the computable max of any other piece can fit on a single rows×cols layer.
+        Randomly place all vessels according to counts, drawing from rng
+        if given, else from the board's own generator.
+        sampler 'fast' takes the first layout the packing search finds, which
+        favours some layouts over others; 'uniform' mixes each packed layer
+        with _mix_layer and drops the General on a uniformly chosen free cell,
+        approaching a uniform draw over all legal layouts (see bench.py).
+        Pieces already on the board (an earlier place_all or apply_layout)
+        stay where they are, and the new ones are placed around them.
+        Strictly checks for exactly one General, that every layer can hold
+        its fleet (using the packing capacities from capacity.py; where only
+        bounds are known, fleets above the lower bound are rejected), and that
+        some layer keeps a free cell for the General. Every fleet that passes
+        is placed onto an empty board, crowded layers within a few packing
+        walks or from capacity.py's packing; only around earlier pieces can
+        a layout that exists still be missed.
+        Each layer is packed by _pack_layer, switching to the exhaustive
+        _cover_layer once its dead ends pass PACK_RETRY_RATE per piece (and
+        PACK_MIN_DEAD_ENDS).
+        self.placement records the attempts; a layout that cannot be found
+        raises PlacementError (a RuntimeError) carrying that report.
         """
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler {sampler!r}; expected one of {SAMPLERS}")
         # must have exactly one General
         if counts.get(PieceType.GENERAL, 0) != 1:
             raise ValueError("Exactly one General required")
 
-        # for each non‐General type, check maximum packable on a single layer
+        # group non‐General types by layer, checking each against its capacity
+        layers: Dict[int, List[PieceType]] = {}
+        layer_cells = self.rows * self.cols
+        full = (1 << layer_cells) - 1
+        # cells taken per layer by pieces already on the board; they stay put
+        taken = [self.occupancy >> (z * layer_cells) & full for z in range(self.depth)]
+        filled = [bin(t).count('1') for t in taken]
         for ptype, num in counts.items():
-            if ptype is PieceType.GENERAL:
+            if ptype is PieceType.GENERAL or not num:
                 continue
-
-            # take the “base” rotation (horizontal) to get its bounding box
-            base_shape = _SHAPES_2D[ptype][0]
-            xs = [x for x, y in base_shape]
-            ys = [y for x, y in base_shape]
-            width  = max(xs) - min(xs) + 1
-            height = max(ys) - min(ys) + 1
-
-            # estimate how many fit if laid out horizontally vs. vertically
-            #   horizontal orientation → dims (height × width)
-            cap_horiz = (self.rows // height) * (self.cols // width)
-            #   vertical (rotated) orientation → dims (width × height)
-            cap_vert  = (self.rows // width) * (self.cols // height)
-
-            max_count = max(cap_horiz, cap_vert)
-            if num > max_count:
+            z = _layer_of(ptype)
+            if z >= self.depth:
+                raise ValueError(f"No layer {z} for {ptype.name.lower()}s on a "
+                                 f"{self.depth}-layer board")
+            lower, upper = capacity_bounds(self.rows, self.cols, _SHAPES_2D[ptype])
+            if num > upper:
+                bound = "maximum is" if lower == upper else "maximum is at most"
+                raise ValueError(
+                    f"Cannot place {num} {ptype.name.lower()}s on a "
+                    f"{self.rows}×{self.cols} layer; {bound} {upper}"
+                )
+            if num > lower:
+                # the upper bound of a wide layer is its area bound, far
+                # above what fits; only up to lower is known to fit
                 raise ValueError(
                     f"Cannot place {num} {ptype.name.lower()}s on a "
-                    f"{self.rows}×{self.cols} layer; maximum is {max_count}"
+                    f"{self.rows}×{self.cols} layer; at most {lower} are known to fit"
                 )
+            filled[z] += num * len(_SHAPES_2D[ptype][0])
+            if filled[z] > layer_cells:
+                raise ValueError(f"Layer {z} cannot hold all its pieces")
+            layers.setdefault(z, []).extend([ptype] * num)
+        if all(f == layer_cells for f in filled):
+            raise ValueError("No free cell left for the General")
 
-        # all checks passed → actually place them
-        for ptype, num in counts.items():
-            for _ in range(num):
-                self._place_random(ptype)
-
-    def _place_random(self, ptype: PieceType):
-        """
-        Attempt up to 1000 times to place a piece without overlap.
-        Depth layer for most vessels is fixed by type; General is random.
-        """
-        shapes = _SHAPES_2D[ptype]
-        for _ in range(1000):
-            shape = random.choice(shapes)
-            max_dx = max(x for x,y in shape)
-            max_dy = max(y for x,y in shape)
-            z = random.randrange(self.depth) if ptype is PieceType.GENERAL else ptype.value - 1
-            x0 = random.randrange(self.cols - max_dx)
-            y0 = random.randrange(self.rows - max_dy)
-            coords = {(x0 + x, y0 + y, z) for x,y in shape}
-            if any(c in self.occupied for c in coords):
+        # all checks passed → actually place them, one layer at a time;
+        # the General goes last into whatever room the fleet left
+        rng = self.rng if rng is None else _as_random(rng)
+        report = self.placement = PlacementReport()
+        report.demand = {z: f / layer_cells for z, f in enumerate(filled)}
+        try:
+            for z, ptypes in layers.items():
+                packed = self._pack_layer(ptypes, rng, taken[z])
+                if packed is None:
+                    if self.stats is not None:
+                        self.stats.exhaustive_layers += 1
+                    report.exhaustive.append(z)
+                    packed = self._cover_layer(ptypes, rng, taken[z])
+                if sampler == 'uniform':
+                    packed = self._mix_layer(packed, rng, taken=taken[z])
+                base = z * layer_cells
+                for ptype, i in packed:
+                    cells = shape_table(ptype, self.rows, self.cols).cells_of(i)
+                    self._add_cells(ptype, [base + c for c in cells])
+            for _ in range(counts[PieceType.GENERAL]):
+                self._place_random(PieceType.GENERAL, rng, uniform=sampler == 'uniform')
+        except RuntimeError as e:
+            report.error = str(e)
+            report.free_anchors = {p: self.free_anchors(p) for p in counts if counts[p]}
+            raise PlacementError(f"{e} ({report.describe()})", report) from None
+        finally:
+            report.fill = {z: bin(self.occupancy >> (z * layer_cells)
+                                  & full).count('1') / layer_cells
+                           for z in range(self.depth)}
+
+    def free_anchors(self, ptype: PieceType) -> int:
+        """
+        Placements of ptype still free on its layer (on any layer for the
+        General), given the pieces placed so far.
+        """
+        layer = self.rows * self.cols
+        full = (1 << layer) - 1
+        masks = shape_table(ptype, self.rows, self.cols).masks
+        layers = range(self.depth) if ptype is PieceType.GENERAL else [_layer_of(ptype)]
+        return sum(not m & occupied
+                   for occupied in (self.occupancy >> (z * layer) & full for z in layers)
+                   for m in masks)
+
+    def _pack_layer(self, ptypes: List[PieceType], rng: Optional[random.Random] = None,
+                    taken: int = 0) -> Optional[List[Tuple[PieceType, int]]]:
+        """
+        Randomly place all ptypes on one layer, around the cells already
+        taken there (a layer bitmask).
+        Each type's legal placements are put in a random order; pieces then
+        take the first free placement in that order, backtracking when a
+        piece has nowhere left to go. Identical pieces only take placements
+        later in the order than their predecessor, so permutations are never
+        revisited. The order is shuffled lazily (a Fisher-Yates step each time
+        the search reaches a new position), so sparse layers only draw the
+        few placements they test.
+        Returns (ptype, placement id) pairs, ids into shape_table(ptype, ...),
+        or None once the dead ends pass PACK_RETRY_RATE per piece, and at
+        least PACK_MIN_DEAD_ENDS (crowded layers are left to _cover_layer).
+        """
+        # biggest shapes first: they are the hardest to fit late
+        ptypes = sorted(ptypes, key=lambda p: -len(_SHAPES_2D[p][0]))
+        rng = rng or self.rng
+        tables = {p: shape_table(p, self.rows, self.cols) for p in ptypes}
+        # per type: the swapped-in placement ids of the random order, by
+        # position (positions never swapped hold their own id), and the
+        # number of positions shuffled so far
+        orders: Dict[PieceType, Dict[int, int]] = {p: {} for p in tables}
+        drawn: Dict[PieceType, int] = {p: 0 for p in tables}
+
+        budget = max(PACK_MIN_DEAD_ENDS, int(PACK_RETRY_RATE * len(ptypes)))
+        # chosen[i] = position in orders[ptypes[i]] of piece i's placement
+        chosen: List[int] = []
+        occupied = taken  # layer cells covered, by the chosen pieces or before
+        start = 0
+        tried = [0] * len(ptypes)  # placements tested per piece
+        dead_ends = 0
+        while len(chosen) < len(ptypes):
+            i = len(chosen)
+            ptype = ptypes[i]
+            order, mask, n = orders[ptype], tables[ptype].mask, len(tables[ptype])
+            pos = start
+            while pos < n:
+                if pos == drawn[ptype]:
+                    j = rng.randrange(pos, n)
+                    order[pos], order[j] = order.get(j, j), order.get(pos, pos)
+                    drawn[ptype] += 1
+                m = mask(order[pos])
+                if not m & occupied:
+                    break
+                pos += 1
+            tried[i] += pos - start
+            if pos < n:
+                tried[i] += 1
+                chosen.append(pos)
+                occupied |= m
+                # the next identical piece continues after this one
+                nxt = i + 1
+                start = pos + 1 if nxt < len(ptypes) and ptypes[nxt] is ptypes[i] else 0
                 continue
-            piece = Piece(ptype, coords, set())
-            for c in coords:
-                self.occupied[c] = piece
-            self.pieces.append(piece)
+            # dead end: move the previous piece to its next placement
+            dead_ends += 1
+            if not chosen or dead_ends > budget:
+                self._packed(ptypes, None, tried, dead_ends)
+                return None
+            pos = chosen.pop()
+            prev = ptypes[len(chosen)]
+            occupied ^= tables[prev].mask(orders[prev][pos])
+            start = pos + 1
+        self._packed(ptypes, True, tried, dead_ends)
+        return [(ptypes[i], orders[ptypes[i]][pos]) for i, pos in enumerate(chosen)]
+
+    def _packed(self, ptypes: List[PieceType], done: Optional[bool],
+                tried: List[int], dead_ends: int):
+        """Account for a _pack_layer run in stats and the placement report."""
+        if self.stats is not None:
+            self.stats.placed(len(ptypes) if done else 0, sum(tried), dead_ends)
+        report = self.placement
+        if report is not None and ptypes:
+            z = _layer_of(ptypes[0])
+            report.dead_ends[z] = report.dead_ends.get(z, 0) + dead_ends
+            if done:
+                report.attempts.extend(zip(ptypes, tried))
+
+    def _cover_layer(self, ptypes: List[PieceType], rng: Optional[random.Random] = None,
+                     taken: int = 0) -> List[Tuple[PieceType, int]]:
+        """
+        Exhaustive placement of ptypes on one layer, around the cells already
+        taken there (a layer bitmask), by _cover_walk: up to COVER_RESTARTS
+        short walks that leave cells empty at random, then one that leaves a
+        cell empty only once nothing fits there. The random walks spread the
+        gaps over the layer but can wander for long on a crowded one, so they
+        stop after COVER_RESTART_RATE options per piece. The last walk is
+        exhaustive, but its search can grow exponentially on layers near
+        capacity: it stops after COVER_BUDGET options. RuntimeError is raised
+        when it runs out of options (no layout exists) or of budget. An empty
+        layer of one piece type skips it for _from_packing, which always
+        succeeds.
+        The layout found is moved by a random symmetry of the layer
+        (_random_symmetry).
+        Returns (ptype, placement id) pairs, as _pack_layer does.
+        """
+        rng = rng or self.rng
+        z = _layer_of(ptypes[0])
+        tried = 0  # options applied, for stats
+        for _ in range(COVER_RESTARTS):
+            chosen, n = self._cover_walk(ptypes, rng, taken, True,
+                                         COVER_RESTART_RATE * len(ptypes))
+            tried += n
+            if chosen is not None:
+                break
+        else:
+            if not taken and len(set(ptypes)) == 1:
+                # an empty layer of one type: thin out a known packing
+                if self.placement is not None:
+                    self.placement.cover_attempts[z] = tried
+                return self._from_packing(ptypes[0], len(ptypes), rng)
+            try:
+                chosen, n = self._cover_walk(ptypes, rng, taken, False, COVER_BUDGET)
+                tried += n
+            finally:
+                if self.placement is not None:
+                    self.placement.cover_attempts[z] = tried
+            if chosen is None:
+                raise RuntimeError(f"Gave up placing {len(ptypes)} {ptypes[0].name.lower()}s "
+                                   f"on layer {z} after {COVER_BUDGET} options")
+        if self.stats is not None:
+            self.stats.placed(len(chosen), tried)
+        if self.placement is not None:
+            self.placement.cover_attempts[z] = tried
+        return self._random_symmetry(chosen, rng, taken)
+
+    def _from_packing(self, ptype: PieceType, num: int,
+                      rng: random.Random) -> List[Tuple[PieceType, int]]:
+        """
+        num ptypes on an empty layer, from the packing capacity.py proves
+        the layer's lower bound with: a random num of its pieces, moved by a
+        random symmetry and mixed by _mix_layer. Never fails while num is at
+        most that bound, which place_all checks.
+        """
+        table = shape_table(ptype, self.rows, self.cols)
+        pieces = [(ptype, table.placement(sorted(y * self.cols + x for x, y in piece)))
+                  for piece in rng.sample(packing(self.rows, self.cols, _SHAPES_2D[ptype]), num)]
+        if self.stats is not None:
+            self.stats.placed(num, num)
+        return self._mix_layer(self._random_symmetry(pieces, rng), rng)
+
+    def _cover_walk(self, ptypes: List[PieceType], rng: random.Random, taken: int,
+                    empty_first: bool, limit: int) -> Tuple[Optional[List[Tuple[PieceType, int]]], int]:
+        """
+        One depth-first walk for _cover_layer. Takes the cells in order: the
+        first undecided cell is either covered by a placement starting there
+        or left empty, as long as the layer still has spare cells. Placements
+        are tried in random order; leaving the cell empty comes last, or with
+        empty_first, first as often as a random open cell ends up empty.
+        Returns the layout, or None once limit options have been applied, and
+        the options applied; raises RuntimeError once every option has failed.
+        """
+        layer = self.rows * self.cols
+        remaining: Dict[PieceType, int] = {}
+        for ptype in ptypes:
+            remaining[ptype] = remaining.get(ptype, 0) + 1
+        tables = {p: shape_table(p, self.rows, self.cols) for p in remaining}
+        # per type: placement ids by lowest cell, filled in as cells are reached
+        starts: Dict[PieceType, Dict[int, Tuple[int, ...]]] = {p: {} for p in remaining}
+        need = sum(len(_SHAPES_2D[p][0]) for p in ptypes)  # cells the pieces left cover
+        spare = layer - bin(taken).count('1') - need
+        if spare < 0:
+            raise RuntimeError(f"Cannot place piece {ptypes[0]}")
+
+        used = taken
+        left = len(ptypes)
+        chosen: List[Tuple[PieceType, int]] = []
+        # one frame per decided cell: (cell, options, index of option applied)
+        stack: List[list] = []
+        advance = True
+        tried = 0
+        while True:
+            if advance:
+                if not left:
+                    return chosen, tried
+                low = ~used & -(1 << (stack[-1][0] + 1 if stack else 0))
+                cell = (low & -low).bit_length() - 1
+                options: List[Optional[Tuple[PieceType, int]]] = []
+                if cell < layer:
+                    for ptype, n in remaining.items():
+                        if n:
+                            at = starts[ptype].get(cell)
+                            if at is None:
+                                at = starts[ptype][cell] = tables[ptype].starting_at(cell)
+                            mask = tables[ptype].mask
+                            options.extend((ptype, i) for i in at if not mask(i) & used)
+                    rng.shuffle(options)
+                    if spare:  # leave the cell empty
+                        first = empty_first and rng.random() * (spare + need) < spare
+                        options.insert(0 if first else len(options), None)
+                stack.append([cell, options, -1])
+            # undo the option applied at the top frame, then apply the next one
+            frame = stack[-1]
+            cell, options, k = frame
+            if k >= 0:
+                option = options[k]
+                if option is None:
+                    used ^= 1 << cell
+                    spare += 1
+                else:
+                    used ^= tables[option[0]].mask(option[1])
+                    remaining[option[0]] += 1
+                    need += len(_SHAPES_2D[option[0]][0])
+                    left += 1
+                    chosen.pop()
+            k += 1
+            if k == len(options):
+                stack.pop()
+                if not stack:
+                    raise RuntimeError(f"Cannot place piece {ptypes[0]}")
+                advance = False
+                continue
+            if tried == limit:
+                return None, tried
+            frame[2] = k
+            tried += 1
+            option = options[k]
+            if option is None:
+                used |= 1 << cell
+                spare -= 1
+            else:
+                used |= tables[option[0]].mask(option[1])
+                remaining[option[0]] -= 1
+                need -= len(_SHAPES_2D[option[0]][0])
+                left -= 1
+                chosen.append(option)
+            advance = True
+
+    def _random_symmetry(self, pieces: List[Tuple[PieceType, int]], rng: random.Random,
+                         taken: int = 0) -> List[Tuple[PieceType, int]]:
+        """
+        Move a layer's (ptype, placement id) pairs by a random symmetry of
+        the layer: mirrors, and transposition on square layers. _cover_layer
+        settles the first cells of its walk first, which skews where pieces
+        and gaps end up; the symmetry spreads that skew evenly over the
+        layer. Only symmetries that keep every piece shape and the taken
+        cells unchanged are drawn from.
+        """
+        rows, cols = self.rows, self.cols
+        def move(c, swap, fx, fy):
+            y, x = divmod(c, cols)
+            if swap:
+                x, y = y, x
+            return (rows - 1 - y if fy else y) * cols + (cols - 1 - x if fx else x)
+        types = {p for p, _ in pieces}
+        cells = [c for c in range(rows * cols) if taken >> c & 1]
+        options = [(swap, fx, fy) for swap in ((False, True) if rows == cols else (False,))
+                   for fx in (False, True) for fy in (False, True)
+                   if all(_symmetric(p, swap, fx, fy) for p in types)
+                   and sum(1 << move(c, swap, fx, fy) for c in cells) == taken]
+        swap, fx, fy = rng.choice(options)
+        if not (swap or fx or fy):
+            return pieces
+        moved = []
+        for ptype, i in pieces:
+            table = shape_table(ptype, rows, cols)
+            moved.append((ptype, table.placement(sorted(move(c, swap, fx, fy)
+                                                        for c in table.cells_of(i)))))
+        return moved
+
+    def _mix_layer(self, packed: List[Tuple[PieceType, int]], rng: random.Random,
+                   sweeps: int = UNIFORM_SWEEPS, taken: int = 0) -> List[Tuple[PieceType, int]]:
+        """
+        Randomize a packed layer by a Markov chain over its layouts; it makes
+        sweeps moves per piece.
+        Each move sends a random piece to a random placement of its type, and
+        is kept only if that placement is free. The proposal is symmetric, so
+        the chain leaves the uniform distribution over layouts unchanged. On
+        a crowded layer single pieces rarely find room, so where lifting two
+        pieces frees at most UNIFORM_PAIR_FREE cells, each sweep also makes a
+        pair move: two random pieces are lifted and put back on a uniformly
+        drawn pair of placements inside the cells they leave free (a
+        heat-bath step, which also keeps the uniform distribution).
+        Neither move reaches every layout of every layer, so the result is
+        closer to uniform, not exactly uniform; bench.py measures how close.
+        """
+        pieces = list(packed)
+        if not pieces:
+            return pieces
+        tables = {p: shape_table(p, self.rows, self.cols) for p, _ in pieces}
+        used = taken  # pieces placed before stay put
+        for ptype, i in pieces:
+            used |= tables[ptype].mask(i)
+        n = len(pieces)
+        spare = self.rows * self.cols - bin(used).count('1')
+        sizes = {p: len(_SHAPES_2D[p][0]) for p in tables}
+        pairs = n > 1 and spare + 2 * max(sizes.values()) <= UNIFORM_PAIR_FREE
+        starts = None
+        if pairs:  # placements starting at each cell, with their masks
+            starts = {p: [[(i, table.mask(i)) for i in table.starting_at(c)]
+                          for c in range(self.rows * self.cols)]
+                      for p, table in tables.items()}
+        if self.stats is not None:
+            self.stats.placed(0, sweeps * (n + 1 if pairs else n))
+        for step in range(sweeps * n):
+            k = rng.randrange(n)
+            ptype, old = pieces[k]
+            table = tables[ptype]
+            new = rng.randrange(len(table))
+            rest = used ^ table.mask(old)
+            mask = table.mask(new)
+            if not mask & rest:
+                pieces[k] = (ptype, new)
+                used = rest | mask
+            if starts is not None and step % n == 0:
+                used = self._move_pair(pieces, tables, starts, used, rng)
+        return pieces
+
+    def _move_pair(self, pieces: List[Tuple[PieceType, int]], tables: Dict[PieceType, ShapeTable],
+                   starts: Dict[PieceType, List[List[Tuple[int, int]]]], used: int,
+                   rng: random.Random) -> int:
+        """
+        _mix_layer's pair move, in place on pieces; returns the new occupancy.
+        Lists the placements of each lifted piece's type that lie inside the
+        free cells (each starts at one of them), then draws uniformly among
+        the non-overlapping pairs.
+        """
+        k, m = rng.sample(range(len(pieces)), 2)
+        (pk, ik), (pm, im) = pieces[k], pieces[m]
+        rest = used ^ tables[pk].mask(ik) ^ tables[pm].mask(im)
+        free = ~rest & ((1 << self.rows * self.cols) - 1)
+        inside = {}
+        for ptype in {pk, pm}:
+            at = starts[ptype]
+            inside[ptype] = found = []
+            cells = free
+            while cells:
+                low = cells & -cells
+                found.extend(p for p in at[low.bit_length() - 1] if not p[1] & rest)
+                cells ^= low
+        options = [(a, b, ma | mb) for a, ma in inside[pk] for b, mb in inside[pm] if not ma & mb]
+        a, b, mask = rng.choice(options)  # never empty: the lifted pair itself fits
+        pieces[k], pieces[m] = (pk, a), (pm, b)
+        return rest | mask
+
+    def layout(self) -> Tuple[Tuple[PieceType, Tuple[int, ...]], ...]:
+        """Placed pieces as (type, sorted bit indices) pairs, in placement order."""
+        return tuple((p.piece_type, tuple(sorted(p.cells))) for p in self.pieces)
+
+    def apply_layout(self, layout: Iterable[Tuple[PieceType, Iterable[int]]]):
+        """
+        Place pieces from a layout() of an empty board of the same size.
+        Costs one step per piece cell, with no placement search.
+        """
+        for ptype, cells in layout:
+            self._add_cells(ptype, cells)
+
+    def _add_piece(self, ptype: PieceType, z: int, layer_mask: int) -> Piece:
+        """Register a piece covering layer_mask on layer z."""
+        base = z * self.rows * self.cols
+        cells = []
+        rest = layer_mask
+        while rest:
+            low = rest & -rest
+            cells.append(base + low.bit_length() - 1)
+            rest ^= low
+        return self._add_cells(ptype, cells)
+
+    def _add_cells(self, ptype: PieceType, cells: Iterable[int]) -> Piece:
+        """Register a piece covering the given bit indices."""
+        layer, cols = self.rows * self.cols, self.cols
+        at: Dict[Coordinate, int] = {}
+        for i in cells:
+            z, rem = divmod(i, layer)
+            y, x = divmod(rem, cols)
+            at[(x, y, z)] = i
+        # built relative to the lowest cell: one board-sized shift per piece
+        low = min(at.values(), default=0)
+        mask = 0
+        for i in at.values():
+            mask |= 1 << (i - low)
+        # slots follow sorted(coords)
+        ordered = [at[c] for c in sorted(at)]
+        pieces = self.pieces
+        pos = len(pieces.cells)
+        pid = pieces.add(ptype, ordered)
+        for i in ordered:
+            self.piece_ids[i] = pid
+            self._pos[i] = pos
+            pos += 1
+        self.occupancy |= mask << low
+        self._cell_at.update(at)
+        return Piece(pieces, pid)
+
+    def _place_random(self, ptype: PieceType, rng: Optional[random.Random] = None,
+                      uniform: bool = False):
+        """
+        Place a single piece uniformly at random among its free placements.
+        Depth layer for most vessels is fixed by type; the General picks a
+        random layer among those with room left, or with uniform=True a
+        random free placement over all of them.
+        Up to PLACE_DRAWS random candidates are tested first; only if all are
+        taken is every candidate tested and one of the free ones drawn.
+        """
+        layer = self.rows * self.cols
+        rng = rng or self.rng
+        full = (1 << layer) - 1
+        if ptype is PieceType.GENERAL:
+            layers = [z for z in range(self.depth)
+                      if (self.occupancy >> (z * layer)) & full != full]
+        else:
+            layers = [_layer_of(ptype)]
+        if layers and not uniform:
+            layers = [rng.choice(layers)]
+        table = shape_table(ptype, self.rows, self.cols)
+        occupied = {z: (self.occupancy >> (z * layer)) & full for z in layers}
+        n = len(table)
+        tried = 0
+        # a candidate drawn uniformly and kept only if free is a uniform
+        # draw among the free ones
+        while n and layers and tried < PLACE_DRAWS:
+            z, mask = rng.choice(layers), table.mask(rng.randrange(n))
+            tried += 1
+            if not mask & occupied[z]:
+                self._tried_random(ptype, True, tried)
+                self._add_piece(ptype, z, mask)
+                return
+        free = [(z, i) for z in layers for i in range(n) if not table.mask(i) & occupied[z]]
+        tried += len(layers) * n
+        self._tried_random(ptype, bool(free), tried)
+        if free:
+            z, i = rng.choice(free)
+            self._add_piece(ptype, z, table.mask(i))
             return
         raise RuntimeError(f"Cannot place piece {ptype}")
 
+    def _tried_random(self, ptype: PieceType, done: bool, tried: int):
+        """Account for a _place_random call in stats and the placement report."""
+        if self.stats is not None:
+            self.stats.placed(int(done), tried)
+        if done and self.placement is not None:
+            self.placement.attempts.append((ptype, tried))
+
     def receive_fire(self, coord: Coordinate) -> Signal:
         """
         Called when opponent fires at coord.
-        Returns the resulting Signal.
+        Returns the resulting Signal (MISS for off-board coordinates).
         """
-        piece = self.occupied.get(coord)
-        if not piece:
+        idx = self._cell_at.get(coord)
+        if idx is None:
+            return Signal.MISS  # empty, or off the board
+        # receive_fire_at inlined for an occupied cell: one call less per hit
+        # keeps the tuple path level with the original dict/set one
+        pid = self.piece_ids[idx]
+        self.hit_mask |= 1 << idx
+        pieces = self.pieces
+        pos = self._pos[idx]
+        hit, remaining = pieces.hit, pieces.remaining
+        single = pieces.types[pid] in _SINGLE_HIT_CODES
+        if hit[pos]:
+            return Signal.KILL if single or not remaining[pid] else Signal.HIT
+        hit[pos] = 1
+        left = remaining[pid] - 1
+        remaining[pid] = left
+        if single:
+            if left + 1 < pieces.start[pid + 1] - pieces.start[pid]:
+                return Signal.KILL  # already sunk by an earlier hit
+        elif left:
+            return Signal.HIT
+        pieces._sunk(pid)
+        return Signal.KILL
+
+    def receive_fire_at(self, idx: int) -> Signal:
+        """receive_fire by flat cell index; idx is not bounds-checked."""
+        pid = self.piece_ids[idx]
+        if pid < 0:
             return Signal.MISS
-        return piece.register_hit(coord)
+        self.hit_mask |= 1 << idx
+        pieces = self.pieces
+        # PieceTable.hit_slot inlined, noting whether this shot sinks the piece
+        pos = self._pos[idx]
+        hit, remaining = pieces.hit, pieces.remaining
+        single = pieces.types[pid] in _SINGLE_HIT_CODES
+        if hit[pos]:
+            return Signal.KILL if single or not remaining[pid] else Signal.HIT
+        hit[pos] = 1
+        left = remaining[pid] - 1
+        remaining[pid] = left
+        if single:
+            if left + 1 < pieces.start[pid + 1] - pieces.start[pid]:
+                return Signal.KILL  # already sunk by an earlier hit
+        elif left:
+            return Signal.HIT
+        pieces._sunk(pid)
+        return Signal.KILL
+
+    def receive_fire_batch(self, cells):
+        """
+        Resolve a sequence of shots at once, with exactly the results and final
+        state of calling receive_fire_at on each in order (repeats included).
+        cells: NumPy int array of flat cell indices, or an (n, 3) array of
+        (x, y, z) coordinates. Off-board coordinates MISS, as in receive_fire;
+        a flat index outside the board raises IndexError.
+        Returns an int8 array of Signal values. Requires NumPy.
+        """
+        import numpy as np
+        cells = np.asarray(cells, dtype=np.int64)
+        off_board = None
+        if cells.ndim == 2:
+            x, y, z = cells[:, 0], cells[:, 1], cells[:, 2]
+            off_board = ~((0 <= x) & (x < self.cols) & (0 <= y) & (y < self.rows)
+                          & (0 <= z) & (z < self.depth))
+            # off-board rows read cell 0, then are masked out as misses
+            cells = np.where(off_board, 0, (z * self.rows + y) * self.cols + x)
+        elif len(cells) and (cells.min() < 0 or cells.max() >= len(self.piece_ids)):
+            raise IndexError(f"Cell index out of range 0..{len(self.piece_ids) - 1}")
+        out = np.full(len(cells), Signal.MISS.value, dtype=np.int8)
+        pieces = self.pieces
+        pids = np.frombuffer(self.piece_ids, dtype=np.int32)[cells]
+        if off_board is not None:
+            pids[off_board] = -1
+        shot = np.flatnonzero(pids >= 0)
+        if not len(shot):
+            return out
+        pid = pids[shot].astype(np.int64)
+        pos = np.frombuffer(self._pos, dtype=np.uint32)[cells[shot]].astype(np.int64)
+        hit = np.frombuffer(pieces.hit, dtype=np.uint8)
+        remaining = np.frombuffer(pieces.remaining, dtype=np.uint16)
+        start = np.frombuffer(pieces.start, dtype=np.uint32).astype(np.int64)
+        single = np.isin(np.frombuffer(pieces.types, dtype=np.uint8),
+                         list(_SINGLE_HIT_CODES))
+
+        # a shot registers a hit only on the first shot at a cell not hit before
+        new = np.zeros(len(shot), dtype=bool)
+        _, first = np.unique(pos, return_index=True)
+        new[first] = True
+        new &= hit[pos] == 0
+        # new hits on the same piece up to and including each shot, in order
+        order = np.argsort(pid, kind='stable')
+        run = np.cumsum(new[order])
+        group_start = np.r_[True, pid[order][1:] != pid[order][:-1]]
+        run -= np.maximum.accumulate(np.where(group_start, run - new[order], 0))
+        so_far = np.empty_like(run)
+        so_far[order] = run
+        left = remaining[pid].astype(np.int64) - so_far
+        out[shot] = np.where(single[pid] | (left == 0), Signal.KILL.value, Signal.HIT.value)
+
+        # apply the new hits; pieces sink on their first hit (single-hit types)
+        # or their last (multi-hit types)
+        hit_pids = pid[new]
+        touched = np.unique(hit_pids)
+        before = remaining[touched]
+        hit[pos[new]] = 1
+        np.subtract.at(remaining, hit_pids, 1)
+        size = start[touched + 1] - start[touched]
+        sunk = np.where(single[touched], before == size, remaining[touched] == 0)
+        for sunk_pid in touched[sunk].tolist():
+            pieces._sunk(sunk_pid)
+        bits = np.zeros(len(self.piece_ids), dtype=bool)
+        bits[cells[shot]] = True
+        self.hit_mask |= int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+        return out
+
+    def snapshot(self) -> tuple:
+        """
+        Capture the board's hit state, for restore().
+        Copies only what firing changes: hit flags and remaining hits per
+        piece, and the afloat counts. The layout (pieces, piece_ids,
+        occupancy) never changes once placed and is shared, as is hit_mask,
+        an immutable int. The snapshot itself is never modified, so it can be
+        restored any number of times.
+        """
+        pieces = self.pieces
+        return (pieces, self.hit_mask, bytes(pieces.hit), pieces.remaining[:],
+                dict(pieces.live), pieces.afloat)
+
+    def restore(self, snap: tuple):
+        """
+        Return the board to a snapshot() of itself, in place; pieces must
+        not have been added since. Raises ValueError for another board's snapshot.
+        """
+        pieces, hit_mask, hit, remaining, live, afloat = snap
+        if pieces is not self.pieces or len(hit) != len(pieces.hit):
+            raise ValueError("Snapshot was taken from another board or layout")
+        self.hit_mask = hit_mask
+        pieces.hit[:] = hit
+        pieces.remaining[:] = remaining
+        pieces.live.update(live)
+        pieces.afloat = afloat
 
     def all_non_general_sunk(self) -> bool:
         """
         Check if all vessels (except the General) are sunk.
         Used to detect alternate win condition.
         """
-        return all(
-            p.is_sunk()
-            for p in self.pieces
-            if p.piece_type != PieceType.GENERAL
-        )
+        return not self.pieces.afloat
+
+# View character per shot result, as a byte
+_VIEW_CHARS = {Signal.MISS: ord('O'), Signal.HIT: ord('X'), Signal.KILL: ord('!')}
 
 class Game:
     """
@@ -206,34 +1316,82 @@ class Game:
     - Manages player's turns, input parsing and hit/miss feedback
     - Supports 'show' to reveal own board and 'quit' to abort game
     """
-    def __init__(self, depth: int, rows: int, cols: int, counts: Dict[PieceType,int]):
-        self.boards = [Board3D(depth, rows, cols), Board3D(depth, rows, cols)]
-        for b in self.boards:
-            b.place_all(counts)
-        self.shots = [set(), set()]
+    def __init__(self, depth: int, rows: int, cols: int, counts: Dict[PieceType,int],
+                 layouts=None, seed: Optional[int] = None, rng=None,
+                 sampler: str = 'fast', salvo: bool = False,
+                 renderer: Optional[Renderer] = None, stats: Optional[GameStats] = None):
+        """
+        layouts: optional pair of Board3D.layout() results to use instead of
+        random placement (counts is then not checked).
+        seed: placement seed; both boards are placed from random.Random(seed),
+        so the same seed and counts give the same game. Drawn from rng (see
+        _as_random) when not given, and kept as self.seed.
+        sampler: layout sampler for Board3D.place_all.
+        salvo: play the salvo variant, where each turn fires salvo_size()
+        shots at once (see fire_salvo) and then passes, hit or miss.
+        renderer: draws views and reveals (default: render.TextRenderer).
+        stats: optional stats.GameStats collecting placement counters and
+        latencies for this game (see stats.py); None measures nothing.
+        """
+        if seed is None and layouts is None:
+            seed = _as_random(rng).getrandbits(63)
+        self.seed = seed
+        self.counts = dict(counts)
+        self.sampler = sampler
+        self.salvo = salvo
+        self.renderer = renderer if renderer is not None else TextRenderer()
+        self.stats = stats
+        placer = random.Random(seed)
+        self.boards = [Board3D(depth, rows, cols, placer, stats),
+                       Board3D(depth, rows, cols, placer, stats)]
+        for i, b in enumerate(self.boards):
+            if layouts is None:
+                b.place_all(counts, sampler=sampler)
+            else:
+                b.apply_layout(layouts[i])
+        # optional shot listener with a record(player, idx, sig) method,
+        # e.g. replay.ReplayWriter
+        self.recorder = None
+        self.shot_masks = [0, 0]  # per-player bitboards of fired cells
+        # per-player shot results: bit index -> Signal, written once per shot
+        self.ledger: List[Dict[int, Signal]] = [{}, {}]
+        # per-player view characters, one per cell, kept in step with the ledger
+        cells = depth * rows * cols
+        self._view = [bytearray(b'.' * cells), bytearray(b'.' * cells)]
         self.current = 0
+        self.winner: Optional[int] = None
+        self.win_condition: Optional[WinCondition] = None
+
+    @property
+    def shots(self) -> List[Set[Coordinate]]:
+        """Fired coordinates per player, decoded from shot_masks (read-only view)."""
+        board = self.boards[0]
+        layer = board.rows * board.cols
+        views = []
+        for mask in self.shot_masks:
+            fired = set()
+            while mask:
+                low = mask & -mask
+                idx = low.bit_length() - 1
+                z, rem = divmod(idx, layer)
+                y, x = divmod(rem, board.cols)
+                fired.add((x, y, z))
+                mask ^= low
+            views.append(fired)
+        return views
 
     def _print_view(self):
         """
         Display current player's known hits/misses grid layer by layer.
-        Unfired cells show '.', hits 'X', kills '!'.
-        """
-        opp = 1 - self.current
-        print(f"Player {self.current+1}'s view (levels 0..{self.boards[0].depth-1}):")
-        for z in range(self.boards[0].depth):
-            print(f" Level {z}:")
-            for y in range(self.boards[0].rows):
-                row = []
-                for x in range(self.boards[0].cols):
-                    coord = (x,y,z)
-                    if coord in self.shots[self.current]:
-                        sig = self.boards[opp].receive_fire(coord)
-                        char = {'MISS':'O','HIT':'X','KILL':'!'}[sig.name]
-                        row.append(char)
-                    else:
-                        row.append('.')
-                print(' '.join(row))
-            print()
+        Unfired cells show '.', misses 'O', hits 'X', kills '!'.
+        Reads only the player's view buffer, never the opponent's board.
+        """
+        if self.stats is None:
+            self.renderer.view(self)
+            return
+        t0 = perf_counter_ns()
+        self.renderer.view(self)
+        self.stats.timed('view', perf_counter_ns() - t0)
 
     def start(self):
         """
@@ -243,7 +1401,15 @@ class Game:
         print("Starting 3D Submarines Game!")
         while True:
             self._print_view()
-            cmd = input(f"Player {self.current+1}, enter 'depth,row,column' ('z,y,x'), or 'show', or 'quit': ").strip().lower()
+            if self.salvo:
+                prompt = (f"Player {self.current+1}, enter a salvo of {self.salvo_size()} "
+                          f"shots 'z,y,x z,y,x ...', or 'show', or 'quit': ")
+            else:
+                prompt = f"Player {self.current+1}, enter 'depth,row,column' ('z,y,x'), or 'show', or 'quit': "
+            t0 = perf_counter_ns()
+            cmd = input(prompt).strip().lower()
+            if self.stats is not None:
+                self.stats.timed('input_wait', perf_counter_ns() - t0)
             if cmd == 'quit':
                 print("Game aborted.")
                 return
@@ -251,58 +1417,191 @@ class Game:
                 self._reveal_board(self.current)
                 continue
             try:
-                z,y,x = map(int, cmd.split(','))
-                coord = (x,y,z)
-            # Check if the coordinate is valid
-            except ValueError:
-                print("Invalid format. Use 'depth,row,column' (z,y,x).")
-                continue
-            # Validate coordinate bounds
-            board = self.boards[self.current]
-            if not (0 <= z < board.depth
-                    and 0 <= y < board.rows
-                    and 0 <= x < board.cols):
-                print(f"Out of bounds!  z must be 0–{board.depth-1}, "
-                    f"y 0–{board.rows-1}, x 0–{board.cols-1}.")
+                cells = self.parse_salvo(cmd) if self.salvo else [self.parse_cell(cmd)]
+            except ValueError as e:
+                print(e)
                 continue
-            # Check if already fired at this coordinate
-            if coord in self.shots[self.current]:
-                print("Already fired at that coordinate.")
-                continue
-            # Record shot and resolve
-            self.shots[self.current].add(coord)
-            # Capture piece reference before firing
-            target_board = self.boards[1-self.current]
-            piece = target_board.occupied.get(coord)
-            sig = target_board.receive_fire(coord)
-            print({Signal.MISS: "Miss!", Signal.HIT: "Hit!", Signal.KILL: "Kill!"}[sig])
-            if sig is Signal.MISS:
-                self.current = 1 - self.current
+            if self.salvo:
+                sigs = self.fire_salvo(cells)
+                print(f"Salvo: {sigs.count(Signal.HIT)} hit, {sigs.count(Signal.KILL)} kill, "
+                      f"{sigs.count(Signal.MISS)} miss")
             else:
-                # Win if General destroyed
-                if piece and piece.piece_type == PieceType.GENERAL:
-                    print(f"Player {self.current+1} wins (General down)!")
-                    return
-                # Win if all other vessels are sunk
-                if target_board.all_non_general_sunk():
-                    print(f"Player {self.current+1} wins (all non-General sunk)!")
-                    return
-                # Otherwise, same player continues firing
+                sig = self.fire_at(cells[0])
+                print({Signal.MISS: "Miss!", Signal.HIT: "Hit!", Signal.KILL: "Kill!"}[sig])
+            if self.win_condition is WinCondition.GENERAL_DOWN:
+                print(f"Player {self.winner+1} wins (General down)!")
+                return
+            if self.win_condition is WinCondition.FLEET_ELIMINATED:
+                print(f"Player {self.winner+1} wins (all non-General sunk)!")
+                return
+
+    def parse_shot(self, cmd: str) -> Coordinate:
+        """
+        Parse a "z,y,x" shot for the current player into a coordinate.
+        Raises ValueError with a player-facing message if the input is
+        malformed, out of bounds, or already fired at.
+        """
+        return self.boards[self.current].coord(self.parse_cell(cmd))
+
+    def parse_cell(self, cmd: str) -> int:
+        """parse_shot returning the flat cell index."""
+        try:
+            z,y,x = map(int, cmd.split(','))
+        # Check if the coordinate is valid
+        except ValueError:
+            raise ValueError("Invalid format. Use 'depth,row,column' (z,y,x).") from None
+        # Validate coordinate bounds
+        board = self.boards[self.current]
+        if not (0 <= z < board.depth
+                and 0 <= y < board.rows
+                and 0 <= x < board.cols):
+            raise ValueError(f"Out of bounds!  z must be 0–{board.depth-1}, "
+                             f"y 0–{board.rows-1}, x 0–{board.cols-1}.")
+        # Check if already fired at this coordinate
+        idx = (z * board.rows + y) * board.cols + x
+        if self.shot_masks[self.current] >> idx & 1:
+            raise ValueError("Already fired at that coordinate.")
+        return idx
+
+    def salvo_size(self) -> int:
+        """
+        Shots in the current player's salvo: one per own vessel still afloat
+        (the General excluded), at least one, at most the cells left to fire at.
+        """
+        board = self.boards[self.current]
+        unfired = board.depth * board.rows * board.cols - bin(self.shot_masks[self.current]).count('1')
+        return min(max(board._afloat, 1), unfired)
+
+    def parse_salvo(self, cmd: str) -> List[int]:
+        """
+        Parse a salvo of salvo_size() "z,y,x" shots, separated by spaces or
+        ';', into flat cell indices. Raises ValueError like parse_cell, or if
+        the number of shots is wrong or a cell is repeated.
+        """
+        parts = cmd.replace(';', ' ').split()
+        if len(parts) != self.salvo_size():
+            raise ValueError(f"A salvo is {self.salvo_size()} shots; got {len(parts)}.")
+        cells = [self.parse_cell(p) for p in parts]
+        if len(set(cells)) != len(cells):
+            raise ValueError("A salvo cannot fire at the same cell twice.")
+        return cells
+
+    def fire_salvo(self, cells: List[int]) -> List[Signal]:
+        """
+        Resolve the current player's salvo at cells (flat indices, in bounds,
+        distinct, not fired before) in one Board3D.receive_fire_batch pass.
+        The ledger, view and recorder see each shot in order; the win
+        conditions are checked once, after the whole salvo, the General
+        going first. The turn then passes unless the game is won.
+        """
+        import numpy as np
+        target_board = self.boards[1-self.current]
+        t0 = perf_counter_ns()
+        codes = target_board.receive_fire_batch(np.array(cells, dtype=np.int64)).tolist()
+        if self.stats is not None:
+            self.stats.timed('salvo', perf_counter_ns() - t0)
+        sigs = [Signal(code) for code in codes]
+        mask = self.shot_masks[self.current]
+        for idx, sig in zip(cells, sigs):
+            mask |= 1 << idx
+            # only kills need the piece; piece ids never change once placed
+            self._record(idx, sig, target_board.piece_at(idx) if sig is Signal.KILL else None)
+            if self.recorder is not None:
+                self.recorder.record(self.current, idx, sig)
+        self.shot_masks[self.current] = mask
+        if not target_board.live[PieceType.GENERAL]:
+            self.winner, self.win_condition = self.current, WinCondition.GENERAL_DOWN
+        elif target_board.all_non_general_sunk():
+            self.winner, self.win_condition = self.current, WinCondition.FLEET_ELIMINATED
+        else:
+            self.current = 1 - self.current
+        return sigs
+
+    def snapshot(self) -> tuple:
+        """
+        Capture the match state for restore(): both boards' snapshot() plus
+        the shot masks, ledgers, view buffers, turn and result. Layouts are
+        shared, not copied. Shots restored away are not removed from a
+        recorder's log.
+        """
+        return (tuple(b.snapshot() for b in self.boards), tuple(self.shot_masks),
+                tuple(dict(ledger) for ledger in self.ledger),
+                tuple(bytes(view) for view in self._view),
+                self.current, self.winner, self.win_condition)
+
+    def restore(self, snap: tuple):
+        """Return the match to a snapshot() of itself, in place."""
+        boards, masks, ledgers, views, current, winner, win_condition = snap
+        for board, board_snap in zip(self.boards, boards):
+            board.restore(board_snap)
+        self.current, self.winner, self.win_condition = current, winner, win_condition
+        self.shot_masks = list(masks)
+        for ledger, saved in zip(self.ledger, ledgers):
+            ledger.clear()
+            ledger.update(saved)
+        for view, saved in zip(self._view, views):
+            view[:] = saved
+
+    def fire(self, coord: Coordinate) -> Signal:
+        """
+        Resolve the current player's shot at coord (in bounds, not fired before).
+        A miss passes the turn; a hit or kill keeps it, unless it wins the
+        game, in which case winner and win_condition are set.
+        """
+        return self.fire_at(self.boards[1-self.current].index(coord))
+
+    def fire_at(self, idx: int) -> Signal:
+        """fire by flat cell index."""
+        target_board = self.boards[1-self.current]
+        self.shot_masks[self.current] |= 1 << idx
+        # Capture piece reference before firing
+        piece = target_board.piece_at(idx)
+        stats = self.stats
+        if stats is None:
+            sig = target_board.receive_fire_at(idx)
+        else:
+            t0 = perf_counter_ns()
+            sig = target_board.receive_fire_at(idx)
+            stats.timed('fire', perf_counter_ns() - t0)
+        self._record(idx, sig, piece)
+        if self.recorder is not None:
+            self.recorder.record(self.current, idx, sig)
+        if sig is Signal.MISS:
+            self.current = 1 - self.current
+        # Win if General destroyed
+        elif piece.piece_type is PieceType.GENERAL:
+            self.winner, self.win_condition = self.current, WinCondition.GENERAL_DOWN
+        # Win if all other vessels are sunk
+        elif target_board.all_non_general_sunk():
+            self.winner, self.win_condition = self.current, WinCondition.FLEET_ELIMINATED
+        # Otherwise, same player continues firing
+        return sig
+
+    def _record(self, idx: int, sig: Signal, piece: Optional[Piece]):
+        """
+        Enter the current player's shot result in the ledger and view buffer.
+        A kill marks every cell of the piece already fired at as killed.
+        """
+        ledger, view = self.ledger[self.current], self._view[self.current]
+        if sig is Signal.KILL and piece.piece_type not in _SINGLE_HIT:
+            for i in piece.cells:
+                if i in ledger:
+                    ledger[i] = Signal.KILL
+                    view[i] = _VIEW_CHARS[Signal.KILL]
+        ledger[idx] = sig
+        view[idx] = _VIEW_CHARS[sig]
 
     def _reveal_board(self, player: int):
         """
         Print full layout of 'player's board for debugging or concede.
         '#' marks occupied cells.
         """
-        print(f"--- Player {player+1} Board Reveal ---")
-        board = self.boards[player]
-        for z in range(board.depth):
-            print(f" Level {z}:")
-            for y in range(board.rows):
-                line = ' '.join('#' if (x,y,z) in board.occupied else '.'
-                                 for x in range(board.cols))
-                print(line)
-            print()
+        if self.stats is None:
+            self.renderer.reveal(self, player)
+            return
+        t0 = perf_counter_ns()
+        self.renderer.reveal(self, player)
+        self.stats.timed('reveal', perf_counter_ns() - t0)
 
 ### Main function ###
 
@@ -341,10 +1640,20 @@ if __name__ == '__main__':
                         print("  → Please enter a non-negative integer.\n")
             counts[PieceType.GENERAL] = 1  # always exactly one General
 
+            # Game mode: one shot per turn, or one per vessel afloat (salvo)
+            while True:
+                mode = input("Play salvo mode, one shot per vessel afloat each turn? (y/n): ")\
+                           .strip().lower()
+                if mode in ('y', 'n'):
+                    salvo = mode == 'y'
+                    break
+                print("  → Please enter 'y' or 'n'.\n")
+
             # Summary & final command
             print("\nConfiguration summary:")
             print(f"  Depth layers: {depth}")
             print(f"  Board size:   {rows}×{cols} (rows×cols per layer)")
+            print(f"  Mode:         {'salvo' if salvo else 'classic'}")
             for ptype, num in counts.items():
                 print(f"  {ptype.name.capitalize():10s}: {num}")
 
@@ -353,7 +1662,7 @@ if __name__ == '__main__':
                 cmd = input("\nType 'start' to begin, 'reset' to reconfigure, or 'quit' to abort: ")\
                           .strip().lower()
                 if cmd == 'start':
-                    game = Game(depth, rows, cols, counts)
+                    game = Game(depth, rows, cols, counts, salvo=salvo)
                     game.start()
                     return
                 elif cmd == 'reset':
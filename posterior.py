@@ -0,0 +1,352 @@
+"""
+Monte Carlo posterior over hidden opponent layouts for the 3D Submarines Game.
+- Samples layouts consistent with one player's shot results (a Game.ledger),
+  layer by layer: each layer holds one vessel type, so its samples depend
+  only on the shots at its own cells; the General is added per layout
+- A layer sample covers the damaged cells first, then draws the rest of the
+  fleet among the placements the shots leave possible; further samples are
+  derived from existing ones by single-piece moves that keep the damaged
+  cells covered (as Board3D._mix_layer does for placement)
+- Samples are kept between turns: after new shots only the layers shot at
+  are re-checked, and the samples still consistent are a valid draw from
+  the new posterior, so topping a pool up starts from them
+- refresh(budget) can spread the top-up over worker processes
+"""
+import random
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from main import PieceType, Signal, _SINGLE_HIT, _as_random, _layer_of, shape_table
+
+# A layer sample: the layer masks of its pieces
+LayerSample = Tuple[int, ...]
+Layout = Tuple[Tuple[PieceType, Tuple[int, ...]], ...]
+
+# Moves per piece when deriving a sample from an existing one
+SWEEPS = 4
+# Fresh starts per sample when building a layer sample from scratch
+SCRATCH_TRIES = 64
+# Random draws per piece before packing falls back to listing free placements
+DRAWS = 8
+
+
+class LayerModel:
+    """
+    One layer's fleet (num pieces of ptype): the placements its shots leave
+    possible and a pool of consistent samples.
+    - allowed: placements covering no miss; single-hit types may cover
+      kills, multi-hit types either only kills (sunk) or hits and at least
+      one unfired cell (afloat)
+    - must: cells some piece has to cover (hits and kills)
+    """
+    __slots__ = ('ptype', 'num', 'table', 'allowed', 'allowed_set', 'must',
+                 'through', 'free', 'pool')
+
+    def __init__(self, ptype: PieceType, num: int, rows: int, cols: int):
+        self.ptype, self.num = ptype, num
+        self.table = shape_table(ptype, rows, cols)
+        self.pool: List[LayerSample] = []
+        self.constrain({})
+
+    def constrain(self, shots: Dict[int, Signal]):
+        """
+        Recompute the constraints from the layer's shots (layer cell -> Signal)
+        and drop the pool samples they rule out.
+        """
+        miss = hit = kill = 0
+        for c, sig in shots.items():
+            if sig is Signal.MISS:
+                miss |= 1 << c
+            elif sig is Signal.HIT:
+                hit |= 1 << c
+            else:
+                kill |= 1 << c
+        fired = miss | hit | kill
+        masks = tuple(self.table.masks)
+        if self.ptype in _SINGLE_HIT:
+            ok = [not m & (miss | hit) for m in masks]
+        else:
+            ok = [not m & miss and (m & kill == m if m & kill else bool(m & ~fired))
+                  for m in masks]
+        self.allowed = tuple(m for m, good in zip(masks, ok) if good)
+        self.allowed_set = frozenset(self.allowed)
+        self.must = hit | kill
+        self.free = tuple(m for m in self.allowed if not m & self.must)
+        self.through: Dict[int, Tuple[int, ...]] = {}
+        rest = self.must
+        while rest:
+            low = rest & -rest
+            c = low.bit_length() - 1
+            self.through[c] = tuple(masks[i] for i in self.table.covering[c] if ok[i])
+            rest ^= low
+        self.pool = [s for s in self.pool if self.consistent(s)]
+
+    def consistent(self, sample: LayerSample) -> bool:
+        """Whether sample (non-overlapping pieces) fits the current shots."""
+        union = 0
+        for m in sample:
+            if m not in self.allowed_set:
+                return False
+            union |= m
+        return union & self.must == self.must
+
+    def build(self, rng: random.Random) -> Optional[LayerSample]:
+        """A sample from scratch, or None if SCRATCH_TRIES starts all fail."""
+        for _ in range(SCRATCH_TRIES):
+            used = 0
+            chosen: List[int] = []
+            # cover the damaged cells, lowest first
+            need = self.must
+            while need & ~used and len(chosen) < self.num:
+                rest = need & ~used
+                options = [m for m in self.through[(rest & -rest).bit_length() - 1]
+                           if not m & used]
+                if not options:
+                    break
+                m = rng.choice(options)
+                chosen.append(m)
+                used |= m
+            if need & ~used:
+                continue
+            # then the rest of the fleet on untouched cells
+            free = self.free
+            while len(chosen) < self.num and free:
+                for _ in range(DRAWS):
+                    m = rng.choice(free)
+                    if not m & used:
+                        break
+                else:
+                    options = [m for m in free if not m & used]
+                    if not options:
+                        break
+                    m = rng.choice(options)
+                chosen.append(m)
+                used |= m
+            if len(chosen) == self.num:
+                return tuple(chosen)
+        return None
+
+    def mix(self, sample: LayerSample, rng: random.Random, sweeps: int = SWEEPS) -> LayerSample:
+        """
+        A new sample from sample by sweeps moves per piece: a random piece to
+        a random allowed placement, kept if it overlaps nothing and the
+        damaged cells stay covered. The proposal is symmetric, so the chain
+        keeps the uniform distribution over consistent layer layouts.
+        """
+        pieces = list(sample)
+        n = len(pieces)
+        if not n:
+            return sample
+        used = 0
+        for m in pieces:
+            used |= m
+        allowed, must = self.allowed, self.must
+        for _ in range(sweeps * n):
+            k = rng.randrange(n)
+            new = rng.choice(allowed)
+            rest = used ^ pieces[k]
+            if not new & rest and (rest | new) & must == must:
+                pieces[k] = new
+                used = rest | new
+        return tuple(pieces)
+
+    def grow(self, rng: random.Random) -> Optional[LayerSample]:
+        """
+        Add one sample to the pool, derived from a random pool sample (built
+        from scratch if the pool is empty); None if none could be built.
+        """
+        sample = self.mix(rng.choice(self.pool), rng) if self.pool else self.build(rng)
+        if sample is not None:
+            self.pool.append(sample)
+        return sample
+
+
+def _refill(targets: Dict[int, Tuple[LayerModel, int]], rng: random.Random,
+            deadline: Optional[float] = None) -> Dict[int, List[LayerSample]]:
+    """
+    Grow each layer's pool (layer -> (model, target size)) one sample at a
+    time, round robin, until all reach their targets or the deadline
+    (perf_counter time) passes. Returns the samples added per layer.
+    """
+    added: Dict[int, List[LayerSample]] = {z: [] for z in targets}
+    active = [z for z, (model, target) in targets.items() if len(model.pool) < target]
+    while active:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        for z in list(active):
+            model, target = targets[z]
+            sample = model.grow(rng)
+            if sample is None or len(model.pool) >= target:
+                active.remove(z)
+            if sample is not None:
+                added[z].append(sample)
+    return added
+
+
+def _refill_worker(task) -> Dict[int, List[LayerSample]]:
+    """Worker entry point: top up copies of the pools from a seed until a deadline."""
+    depth, rows, cols, counts, ledger, pools, quota, seed, budget = task
+    deadline = time.perf_counter() + budget
+    sampler = PosteriorSampler(depth, rows, cols, counts, rng=seed)
+    sampler.update(ledger)
+    targets = {}
+    for z, pool in pools.items():
+        model = sampler.models[z]
+        model.pool = list(pool)
+        targets[z] = (model, len(pool) + quota[z])
+    return _refill(targets, sampler.rng, deadline)
+
+
+class PosteriorSampler:
+    """
+    Samples of the opponent board consistent with one player's shots.
+    - update(ledger): take in the player's Game.ledger after each turn
+    - refresh(budget): top every layer pool up to samples (within budget
+      seconds, if given, using workers processes besides this one)
+    - occupancy(): per-cell probability of holding a vessel
+    - layouts(n): full board layouts, as Board3D.layout() returns
+    rng as for Board3D (see main._as_random). Call close() when done if
+    workers were used.
+    """
+    def __init__(self, depth: int, rows: int, cols: int, counts: Dict[PieceType, int],
+                 rng=None, samples: int = 200, workers: int = 0):
+        self.depth, self.rows, self.cols = depth, rows, cols
+        self.counts = dict(counts)
+        self.samples = samples
+        self.workers = workers
+        self.rng = _as_random(rng)
+        self._layer = rows * cols
+        self.models: List[Optional[LayerModel]] = [None] * depth
+        for ptype, num in counts.items():
+            z = _layer_of(ptype)
+            if ptype is PieceType.GENERAL or not num or z >= depth:
+                continue
+            self.models[z] = LayerModel(ptype, num, rows, cols)
+        self._ledger: Dict[int, Signal] = {}
+        self._pool = None
+
+    def update(self, ledger: Dict[int, Signal]):
+        """
+        Take in the player's shot results (bit index -> Signal, as in
+        Game.ledger), re-checking only the layers with new or changed results.
+        """
+        layer = self._layer
+        changed = {idx // layer for idx, sig in ledger.items() if self._ledger.get(idx) is not sig}
+        self._ledger = dict(ledger)
+        for z in changed:
+            model = self.models[z]
+            if model is not None:
+                base = z * layer
+                model.constrain({idx - base: sig for idx, sig in ledger.items()
+                                 if idx // layer == z})
+
+    def refresh(self, budget: Optional[float] = None) -> int:
+        """
+        Top every layer pool up to samples; returns the samples added.
+        With budget (seconds), stop at the deadline instead, and with
+        workers split the missing samples evenly between this process and
+        the workers, which start from copies of the current pools.
+        """
+        deadline = None if budget is None else time.perf_counter() + budget
+        models = [(z, m) for z, m in enumerate(self.models) if m is not None]
+        pending = None
+        shares = self.workers + 1 if self.workers and budget is not None else 1
+        # samples each process adds per layer
+        quota = {z: -(-max(self.samples - len(m.pool), 0) // shares) for z, m in models}
+        if shares > 1:
+            if self._pool is None:
+                self._pool = Pool(self.workers)
+            pools = {z: m.pool for z, m in models}
+            tasks = [(self.depth, self.rows, self.cols, self.counts, self._ledger, pools,
+                      quota, self.rng.getrandbits(63), budget) for _ in range(self.workers)]
+            pending = self._pool.map_async(_refill_worker, tasks)
+        targets = {z: (m, len(m.pool) + quota[z]) for z, m in models}
+        added = sum(len(samples) for samples in _refill(targets, self.rng, deadline).values())
+        if pending is not None:
+            # workers stop at their own deadline; allow a little for the
+            # round trip, and drop their samples if they are later than that
+            pending.wait(max(deadline - time.perf_counter(), 0) + budget / 4)
+            if pending.ready():
+                for part in pending.get():
+                    for z, samples in part.items():
+                        self.models[z].pool.extend(samples)
+                        added += len(samples)
+        return added
+
+    def occupancy(self) -> np.ndarray:
+        """
+        (depth, rows, cols) float array: the fraction of pool samples with a
+        vessel on each cell, plus the General, spread over the unfired cells
+        in proportion to how often they are free. Layers whose pool is empty
+        count as free.
+        """
+        cells = self._layer
+        nbytes = (cells + 7) // 8
+        occ = np.zeros((self.depth, cells))
+        for z, model in enumerate(self.models):
+            if model is None or not model.pool:
+                continue
+            unions = []
+            for sample in model.pool:
+                union = 0
+                for m in sample:
+                    union |= m
+                unions.append(union.to_bytes(nbytes, 'little'))
+            bits = np.unpackbits(np.frombuffer(b''.join(unions), dtype=np.uint8)
+                                 .reshape(len(unions), nbytes), axis=1, bitorder='little')
+            occ[z] = bits[:, :cells].mean(axis=0)
+        if self.counts.get(PieceType.GENERAL):
+            free = (1 - occ).ravel()
+            if self._ledger:
+                free[np.fromiter(self._ledger, dtype=np.int64, count=len(self._ledger))] = 0
+            if free.sum() > 0:
+                occ += (free / free.sum()).reshape(occ.shape)
+        return occ.reshape(self.depth, self.rows, self.cols)
+
+    def layouts(self, n: int) -> List[Layout]:
+        """
+        n board layouts, each combining a random pool sample per layer with
+        the General on a random unfired cell they leave free. Raises
+        RuntimeError if a layer has no sample (refresh() first).
+        """
+        layer = self._layer
+        rng = self.rng
+        out = []
+        for _ in range(n):
+            layout = []
+            occupied = 0
+            for z, model in enumerate(self.models):
+                if model is None:
+                    continue
+                if not model.pool:
+                    raise RuntimeError(f"No layout consistent with the shots found for layer {z}")
+                for m in rng.choice(model.pool):
+                    occupied |= m << (z * layer)
+                    cells = []
+                    while m:
+                        low = m & -m
+                        cells.append(z * layer + low.bit_length() - 1)
+                        m ^= low
+                    layout.append((model.ptype, tuple(cells)))
+            for _ in range(self.counts.get(PieceType.GENERAL, 0)):
+                for _ in range(DRAWS):
+                    idx = rng.randrange(self.depth * layer)
+                    if not occupied >> idx & 1 and idx not in self._ledger:
+                        break
+                else:
+                    idx = rng.choice([i for i in range(self.depth * layer)
+                                      if not occupied >> i & 1 and i not in self._ledger])
+                layout.append((PieceType.GENERAL, (idx,)))
+                occupied |= 1 << idx
+            out.append(tuple(layout))
+        return out
+
+    def close(self):
+        """Stop the worker processes, if any were started."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
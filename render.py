@@ -0,0 +1,127 @@
+"""
+Renderers for 3D Submarines Game views.
+- TextRenderer builds each frame in one string and writes it once
+- DiffRenderer redraws only the cells that changed since the last frame,
+  using ANSI cursor moves
+- NullRenderer draws nothing, for headless runs
+A Game draws through its renderer: view(game) for the current player's shot
+view, reveal(game, player) for a player's own board.
+"""
+import io
+import sys
+from typing import Optional, TextIO
+
+# Board cell characters for reveal frames
+_REVEAL_CHARS = bytes.maketrans(b'01', b'.#')
+
+
+def _spaced(cells: bytes) -> str:
+    """'a b c' from b'abc', without a join per cell."""
+    out = bytearray(b' ' * (2 * len(cells) - 1))
+    out[::2] = cells
+    return out.decode()
+
+
+def view_lines(game) -> list:
+    """Lines of the current player's view frame (see Game._view)."""
+    board = game.boards[0]
+    view = game._view[game.current]
+    lines = [f"Player {game.current+1}'s view (levels 0..{board.depth-1}):"]
+    for z in range(board.depth):
+        lines.append(f" Level {z}:")
+        for y in range(board.rows):
+            start = (z * board.rows + y) * board.cols
+            lines.append(_spaced(view[start:start + board.cols]))
+        lines.append('')
+    return lines
+
+
+def reveal_lines(game, player: int) -> list:
+    """Lines of player's board reveal frame, '#' for occupied cells."""
+    board = game.boards[player]
+    cells = board.depth * board.rows * board.cols
+    occupied = format(board.occupancy, f'0{cells}b')[::-1].encode().translate(_REVEAL_CHARS)
+    lines = [f"--- Player {player+1} Board Reveal ---"]
+    for z in range(board.depth):
+        lines.append(f" Level {z}:")
+        for y in range(board.rows):
+            start = (z * board.rows + y) * board.cols
+            lines.append(_spaced(occupied[start:start + board.cols]))
+        lines.append('')
+    return lines
+
+
+class Renderer:
+    """Renderer interface; the base class draws nothing."""
+    def view(self, game):
+        """Draw the current player's view of the opponent board."""
+
+    def reveal(self, game, player: int):
+        """Draw player's own board."""
+
+
+class NullRenderer(Renderer):
+    """Draws nothing; for headless games."""
+
+
+class TextRenderer(Renderer):
+    """
+    Plain text frames, each built in memory and written with one write().
+    stream defaults to sys.stdout at the time of drawing.
+    """
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def _write(self, lines: list):
+        stream = self.stream or sys.stdout
+        buf = io.StringIO()
+        buf.write('\n'.join(lines))
+        buf.write('\n')
+        stream.write(buf.getvalue())
+        stream.flush()
+
+    def view(self, game):
+        self._write(view_lines(game))
+
+    def reveal(self, game, player: int):
+        self._write(reveal_lines(game, player))
+
+
+class DiffRenderer(TextRenderer):
+    """
+    Keeps the frame at the top of an ANSI terminal and, after the first
+    draw, only rewrites the characters that differ from what is on screen.
+    The cursor is left on the line below the frame, with the rest of the
+    screen cleared, so prompts and messages print underneath it.
+    """
+    def __init__(self, stream: Optional[TextIO] = None):
+        super().__init__(stream)
+        self._screen: Optional[list] = None
+
+    def _draw(self, lines: list):
+        stream = self.stream or sys.stdout
+        out = io.StringIO()
+        old = self._screen
+        if old is None or len(old) != len(lines):
+            out.write('\x1b[2J\x1b[H')
+            out.write('\n'.join(lines))
+        else:
+            for row, (was, now) in enumerate(zip(old, lines), 1):
+                if was == now:
+                    continue
+                if len(was) != len(now):
+                    out.write(f'\x1b[{row};1H\x1b[2K{now}')
+                    continue
+                for col, (a, b) in enumerate(zip(was, now), 1):
+                    if a != b:
+                        out.write(f'\x1b[{row};{col}H{b}')
+        out.write(f'\x1b[{len(lines) + 1};1H\x1b[J')
+        self._screen = lines
+        stream.write(out.getvalue())
+        stream.flush()
+
+    def view(self, game):
+        self._draw(view_lines(game))
+
+    def reveal(self, game, player: int):
+        self._draw(reveal_lines(game, player))
@@ -0,0 +1,183 @@
+"""
+Compact binary replay logs for 3D Submarines Game matches.
+
+Layout of a replay file (all integers little-endian):
+    header    magic b'SUB3', version u8, depth u16, rows u16, cols u16,
+              flags u8 (version 2 on; bit 0 set: seeded, bit 1: uniform sampler,
+              bit 2: salvo game)
+    seeded    placement seed u64, type count u8, then per type
+              type u8, count u16 (Game is rebuilt from seed and counts)
+    layouts   otherwise, for each of the two boards: piece count u32, then
+              per piece type u8, cell count u8, cells u32 each (bit indices)
+    shots     one u32 per shot, in order: player << 31 | Signal << 29 | cell
+
+Shots are fixed-size records, so any turn can be read with one seek, and the
+log can be appended to while the match is running. Seeded replays are a few
+bytes long before the shots, but only replay under the placement code that
+recorded them; game_at() raises ValueError if the shots no longer match.
+"""
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from main import PieceType, Signal, Game
+
+MAGIC = b'SUB3'
+VERSION = 2
+SEEDED = 1
+UNIFORM = 2
+SALVO = 4
+
+_HEADER = struct.Struct('<4sBHHH')
+_FLAGS = struct.Struct('<B')
+_SEED = struct.Struct('<QB')
+_TYPE_COUNT = struct.Struct('<BH')
+_COUNT = struct.Struct('<I')
+_PIECE = struct.Struct('<BB')
+_SHOT = struct.Struct('<I')
+
+# Largest cell index a shot record can hold
+MAX_CELL = (1 << 29) - 1
+
+# A decoded shot: (player, cell bit index, result)
+Shot = Tuple[int, int, Signal]
+
+
+def pack_shot(player: int, idx: int, sig: Signal) -> bytes:
+    return _SHOT.pack(player << 31 | sig.value << 29 | idx)
+
+
+def unpack_shot(data: bytes) -> Shot:
+    word, = _SHOT.unpack(data)
+    return word >> 31, word & MAX_CELL, Signal((word >> 29) & 3)
+
+
+class ReplayWriter:
+    """
+    Streams a match to a binary file object.
+    attach(game) writes the header and layouts and hooks the writer into
+    Game.fire, after which every shot is appended as it is resolved.
+    With seeded=True only Game.seed and Game.counts are stored, not layouts.
+    """
+    def __init__(self, stream: BinaryIO, seeded: bool = False):
+        self.stream = stream
+        self.seeded = seeded
+
+    def attach(self, game: Game):
+        board = game.boards[0]
+        if board.depth * board.rows * board.cols > MAX_CELL + 1:
+            raise ValueError("Board too large for the replay format")
+        if self.seeded and game.seed is None:
+            raise ValueError("Game has no seed (it was built from layouts)")
+        out = [_HEADER.pack(MAGIC, VERSION, board.depth, board.rows, board.cols),
+               _FLAGS.pack((SEEDED if self.seeded else 0)
+                           | (UNIFORM if game.sampler == 'uniform' else 0)
+                           | (SALVO if game.salvo else 0))]
+        if self.seeded:
+            counts = [(p, n) for p, n in game.counts.items() if n]
+            out.append(_SEED.pack(game.seed, len(counts)))
+            out.extend(_TYPE_COUNT.pack(p.value, n) for p, n in counts)
+            self.stream.write(b''.join(out))
+            game.recorder = self
+            return
+        for b in game.boards:
+            layout = b.layout()
+            out.append(_COUNT.pack(len(layout)))
+            for ptype, cells in layout:
+                out.append(_PIECE.pack(ptype.value, len(cells)))
+                out.append(struct.pack(f'<{len(cells)}I', *cells))
+        self.stream.write(b''.join(out))
+        game.recorder = self
+
+    def record(self, player: int, idx: int, sig: Signal):
+        self.stream.write(pack_shot(player, idx, sig))
+
+
+class ReplayReader:
+    """
+    Reads a replay file lazily: only the header and layouts are parsed up
+    front, shots are read on demand from their fixed offsets.
+    """
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        magic, version, self.depth, self.rows, self.cols = _HEADER.unpack(
+            stream.read(_HEADER.size))
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError("Not a 3D Submarines replay (or unsupported version)")
+        flags = _FLAGS.unpack(stream.read(_FLAGS.size))[0] if version > 1 else 0
+        self.seed: Optional[int] = None
+        self.sampler = 'uniform' if flags & UNIFORM else 'fast'
+        self.salvo = bool(flags & SALVO)
+        self.counts: Dict[PieceType, int] = {}
+        self.layouts: Optional[List[Tuple[Tuple[PieceType, Tuple[int, ...]], ...]]] = None
+        if flags & SEEDED:
+            self.seed, ntypes = _SEED.unpack(stream.read(_SEED.size))
+            for _ in range(ntypes):
+                ptype, num = _TYPE_COUNT.unpack(stream.read(_TYPE_COUNT.size))
+                self.counts[PieceType(ptype)] = num
+            self._shots_at = stream.tell()
+            return
+        self.layouts = []
+        for _ in range(2):
+            count, = _COUNT.unpack(stream.read(_COUNT.size))
+            layout = []
+            for _ in range(count):
+                ptype, n = _PIECE.unpack(stream.read(_PIECE.size))
+                cells = struct.unpack(f'<{n}I', stream.read(4 * n))
+                layout.append((PieceType(ptype), cells))
+            self.layouts.append(tuple(layout))
+        self._shots_at = stream.tell()
+
+    def __len__(self) -> int:
+        """Number of shots in the log."""
+        end = self.stream.seek(0, 2)
+        return (end - self._shots_at) // _SHOT.size
+
+    def shot(self, turn: int) -> Shot:
+        """The turn-th shot (0-based)."""
+        self.stream.seek(self._shots_at + turn * _SHOT.size)
+        data = self.stream.read(_SHOT.size)
+        if len(data) < _SHOT.size:
+            raise IndexError(f"Replay has no shot {turn}")
+        return unpack_shot(data)
+
+    def shots(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Shot]:
+        """Stream shots start..stop-1 without loading the rest of the log."""
+        self.stream.seek(self._shots_at + start * _SHOT.size)
+        turn = start
+        while stop is None or turn < stop:
+            data = self.stream.read(_SHOT.size)
+            if len(data) < _SHOT.size:
+                return
+            yield unpack_shot(data)
+            turn += 1
+
+    def game_at(self, turn: Optional[int] = None) -> Game:
+        """
+        Rebuild the match as it stood before shot turn (the end if None),
+        replaying each shot through Game.fire and checking its result.
+        In salvo games each run of one player's shots is replayed as a salvo,
+        so a turn inside a salvo replays the part of it before turn.
+        """
+        game = Game(self.depth, self.rows, self.cols, self.counts,
+                    layouts=self.layouts, seed=self.seed, sampler=self.sampler,
+                    salvo=self.salvo)
+        if not self.salvo:
+            for n, (player, idx, sig) in enumerate(self.shots(0, turn)):
+                if player != game.current or game.fire_at(idx) is not sig:
+                    raise ValueError(f"Replay diverges at shot {n}")
+            return game
+        salvo: List[Shot] = []
+        for shot in self.shots(0, turn):
+            if salvo and shot[0] != salvo[0][0]:
+                self._replay_salvo(game, salvo)
+                salvo = []
+            salvo.append(shot)
+        if salvo:
+            self._replay_salvo(game, salvo)
+        return game
+
+    @staticmethod
+    def _replay_salvo(game: Game, salvo: List[Shot]):
+        if salvo[0][0] != game.current or \
+                game.fire_salvo([idx for _, idx, _ in salvo]) != [sig for _, _, sig in salvo]:
+            raise ValueError("Replay diverges in a salvo")
@@ -0,0 +1,304 @@
+"""
+Asyncio multiplayer server for the 3D Submarines Game.
+- Many Game instances share one event loop; clients are paired in arrival order
+- One line per message, in both directions (ASCII, newline terminated)
+
+Client -> server:
+    z,y,x           fire at depth z, row y, column x
+    show            reveal your own board
+    quit            abort the match
+
+Server -> client:
+    WAIT                        waiting for an opponent
+    START <p> <d> <r> <c>       matched as player p (1 or 2) on a d x r x c board
+    TURN                        your move
+    MISS|HIT|KILL z,y,x         result of your shot
+    INCOMING z,y,x MISS|HIT|KILL    result of your opponent's shot
+    SHOW <cells>                your board, '#' occupied / '.' empty, in bit-index order
+    WIN|LOSE GENERAL_DOWN|FLEET_ELIMINATED
+    ABORT                       your opponent quit or disconnected
+    BYE                         you quit
+    ERR <message>               invalid command; nothing changed
+
+Run with: python server.py --port 8765
+"""
+import argparse
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from layouts import LayoutPool
+from main import PieceType, Board3D, Game
+
+
+class Match:
+    """
+    One game between two connected clients.
+    Commands are resolved synchronously as they arrive, so a match never
+    blocks the loop; replies are queued per player and written by flush(),
+    one write per client per command.
+    """
+    def __init__(self, game: Game, writers: List[asyncio.StreamWriter]):
+        self.game = game
+        self.writers = writers
+        self.over = False
+        self._out: List[List[str]] = [[], []]
+
+    def _send(self, player: int, line: str):
+        self._out[player].append(line)
+
+    async def flush(self):
+        """Write the queued replies and wait for the clients to take them."""
+        for player, lines in enumerate(self._out):
+            if not lines:
+                continue
+            # take the lines first: replies queued while drain() waits go
+            # out with the next flush, and none is written twice
+            self._out[player] = []
+            writer = self.writers[player]
+            if not writer.is_closing():
+                writer.write(('\n'.join(lines) + '\n').encode())
+                await writer.drain()
+
+    def begin(self):
+        board = self.game.boards[0]
+        for player in (0, 1):
+            self._send(player, f"START {player+1} {board.depth} {board.rows} {board.cols}")
+        self._send(self.game.current, "TURN")
+
+    def handle(self, player: int, cmd: str):
+        """Apply one command line from player."""
+        if self.over:
+            return
+        if cmd == 'quit':
+            self._send(player, "BYE")
+            self.abort(player)
+            return
+        if cmd == 'show':
+            board = self.game.boards[player]
+            cells = ''.join('#' if board.occupancy >> i & 1 else '.'
+                            for i in range(board.depth * board.rows * board.cols))
+            self._send(player, f"SHOW {cells}")
+            return
+        if player != self.game.current:
+            self._send(player, "ERR Not your turn.")
+            return
+        try:
+            idx = self.game.parse_cell(cmd)
+        except ValueError as e:
+            self._send(player, f"ERR {e}")
+            return
+        sig = self.game.fire_at(idx)
+        x, y, z = self.game.boards[player].coord(idx)
+        self._send(player, f"{sig.name} {z},{y},{x}")
+        self._send(1 - player, f"INCOMING {z},{y},{x} {sig.name}")
+        if self.game.winner is not None:
+            condition = self.game.win_condition.name
+            self._send(self.game.winner, f"WIN {condition}")
+            self._send(1 - self.game.winner, f"LOSE {condition}")
+            self.over = True
+        else:
+            self._send(self.game.current, "TURN")
+
+    def abort(self, player: int):
+        """player left: tell the other one, and end the match."""
+        if not self.over:
+            self.over = True
+            self._send(1 - player, "ABORT")
+
+
+class GameServer:
+    """
+    Pairs incoming connections into Matches and relays their commands.
+    All matches run on the event loop of the server's caller.
+    With a LayoutPool, new matches take pre-generated layouts instead of
+    running placement on the loop.
+    """
+    def __init__(self, depth: int, rows: int, cols: int, counts: Dict[PieceType, int],
+                 layouts: Optional[LayoutPool] = None):
+        self.depth, self.rows, self.cols = depth, rows, cols
+        self.counts = counts
+        # reject a fleet here, not when the first two clients are paired
+        Board3D(depth, rows, cols).place_all(counts)
+        self.layouts = layouts
+        self._waiting: Optional[Tuple[asyncio.StreamWriter, asyncio.Future]] = None
+        self.active = 0      # matches in progress
+        self.finished = 0    # matches completed or aborted
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0,
+                    backlog: int = 4096) -> asyncio.base_events.Server:
+        """
+        Listen on host:port (0 picks a free port) and return the asyncio server.
+        The deep backlog absorbs bursts of connections from many matches.
+        """
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one client connection from pairing to the end of its match."""
+        try:
+            paired = await self._pair(reader, writer)
+        except Exception as e:
+            # no match could be set up for this pair (the waiting client
+            # gets the pairing client's error through its seat)
+            writer.write(f"ERR {e}\n".encode())
+            writer.close()
+            return
+        if paired is None:  # left while waiting for an opponent
+            writer.close()
+            return
+        match, player, early = paired
+        try:
+            while not match.over:
+                line = early.pop(0) if early else await reader.readline()
+                if not line:
+                    match.abort(player)
+                    break
+                match.handle(player, line.decode(errors='replace').strip().lower())
+                await match.flush()
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than the reader's limit
+            match.abort(player)
+        finally:
+            # also on cancellation or any other error: never leave the
+            # opponent waiting on a match nobody is playing
+            match.abort(player)
+            if match.over:
+                try:
+                    await match.flush()
+                except ConnectionError:
+                    pass
+            if player == 0:
+                self.active -= 1
+                self.finished += 1
+            writer.close()
+
+    async def _pair(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+                    ) -> Optional[Tuple[Match, int, List[bytes]]]:
+        """
+        Wait for an opponent, or take the one already waiting.
+        Returns the match, this client's player number and the lines it sent
+        while waiting, or None if it disconnected before an opponent came.
+        A waiting client's reader is watched for end of file: a peer that
+        closes leaves its transport open, so is_closing() alone misses it.
+        """
+        if self._waiting is None or self._waiting[0].is_closing():
+            seat = asyncio.get_running_loop().create_future()
+            self._waiting = (writer, seat)
+            writer.write(b"WAIT\n")
+            early: List[bytes] = []
+            try:
+                while not seat.done():
+                    read = asyncio.ensure_future(reader.readline())
+                    try:
+                        await asyncio.wait((seat, read), return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        if not read.done():
+                            # no data is consumed until a whole line is in
+                            read.cancel()
+                            await asyncio.wait((read,))
+                    if read.cancelled():
+                        continue
+                    try:
+                        line = read.result()
+                    except (ConnectionError, ValueError):
+                        line = b''
+                    early.append(line)
+                    if not line and not seat.done():
+                        return None
+            finally:
+                if self._waiting is not None and self._waiting[1] is seat:
+                    self._waiting = None
+            return (*seat.result(), early)
+        other, seat = self._waiting
+        self._waiting = None
+        try:
+            if self.layouts is not None:
+                game = self.layouts.game(self.depth, self.rows, self.cols, self.counts)
+            else:
+                game = Game(self.depth, self.rows, self.cols, self.counts)
+        except Exception as e:
+            seat.set_exception(e)  # the waiting client must not hang
+            raise
+        match = Match(game, [other, writer])
+        self.active += 1
+        seat.set_result((match, 0))
+        match.begin()
+        await match.flush()
+        return match, 1, []
+
+
+class Client:
+    """Minimal client for the line protocol, for tests and load generation."""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader, self.writer = reader, writer
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> 'Client':
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def send(self, line: str):
+        self.writer.write(line.encode() + b'\n')
+        await self.writer.drain()
+
+    async def recv(self) -> str:
+        """Next message, or '' once the server closed the connection."""
+        return (await self.reader.readline()).decode().strip()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def random_player(host: str, port: int, rng) -> str:
+    """
+    Connect and play a whole match firing at random unfired cells.
+    Returns the final message (WIN/LOSE/ABORT line).
+    """
+    client = await Client.connect(host, port)
+    cells: List[str] = []
+    try:
+        while True:
+            msg = await client.recv()
+            if msg.startswith('START'):
+                _, _, depth, rows, cols = msg.split()
+                cells = [f"{z},{y},{x}" for z in range(int(depth))
+                         for y in range(int(rows)) for x in range(int(cols))]
+                rng.shuffle(cells)
+            elif msg == 'TURN':
+                await client.send(cells.pop())
+            elif not msg or msg.split()[0] in ('WIN', 'LOSE', 'ABORT'):
+                return msg
+    finally:
+        await client.close()
+
+
+async def _serve(host: str, port: int, server: GameServer):
+    srv = await server.start(host, port)
+    print(f"Serving on {', '.join(str(s.getsockname()) for s in srv.sockets)}")
+    async with srv:
+        await srv.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the 3D Submarines Game server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rows', type=int, default=5)
+    parser.add_argument('--cols', type=int, default=5)
+    parser.add_argument('--subs', type=int, default=1)
+    parser.add_argument('--destroyers', type=int, default=1)
+    parser.add_argument('--jets', type=int, default=1)
+    parser.add_argument('--pool', type=int, default=0,
+                        help="pre-generated layouts to keep ready (default: none)")
+    args = parser.parse_args()
+
+    counts = {
+        PieceType.SUBMARINE: args.subs,
+        PieceType.DESTROYER: args.destroyers,
+        PieceType.JET: args.jets,
+        PieceType.GENERAL: 1,
+    }
+    pool = LayoutPool(args.pool) if args.pool else None
+    if pool is not None:
+        pool.warm(3, args.rows, args.cols, counts)
+    asyncio.run(_serve(args.host, args.port,
+                       GameServer(3, args.rows, args.cols, counts, layouts=pool)))
@@ -0,0 +1,200 @@
+"""
+Headless AI vs AI simulation for the 3D Submarines Game.
+- Plays complete matches through Game.fire, without input() or print
+- Spreads batches of matches over a process pool, one seed per chunk
+- Aggregates win rates, game lengths and win-condition splits
+Run with: python simulate.py --games 100000 --rows 8 --cols 8
+"""
+import argparse
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+from ai import DensityAI
+from main import SAMPLERS, Coordinate, PieceType, Signal, WinCondition, Game
+
+### AI players ###
+
+class HuntTargetAI:
+    """
+    Simple opponent: fires at random unfired cells ("hunt") and, after a
+    HIT, at the same-layer neighbours of the damaged cell ("target").
+    """
+    def __init__(self, depth: int, rows: int, cols: int,
+                 counts: Dict[PieceType, int], rng: random.Random):
+        self.rows = rows
+        self.cols = cols
+        self._hunt: List[Coordinate] = [(x, y, z)
+                                        for z in range(depth)
+                                        for y in range(rows)
+                                        for x in range(cols)]
+        rng.shuffle(self._hunt)
+        self._targets: List[Coordinate] = []
+        self._fired = set()
+
+    def choose(self) -> Coordinate:
+        """Next cell to fire at; never one fired before."""
+        while self._targets:
+            coord = self._targets.pop()
+            if coord not in self._fired:
+                return coord
+        while True:
+            coord = self._hunt.pop()
+            if coord not in self._fired:
+                return coord
+
+    def observe(self, coord: Coordinate, sig: Signal):
+        """Record the outcome of the last shot."""
+        self._fired.add(coord)
+        if sig is Signal.HIT:
+            x, y, z = coord
+            for nx, ny in ((x-1, y), (x+1, y), (x, y-1), (x, y+1)):
+                if 0 <= nx < self.cols and 0 <= ny < self.rows:
+                    self._targets.append((nx, ny, z))
+        elif sig is Signal.KILL:
+            self._targets.clear()
+
+# Players selectable by name from the command line
+AI_PLAYERS = {
+    'hunt': HuntTargetAI,
+    'density': DensityAI,
+}
+
+### Match results ###
+
+@dataclass
+class MatchResult:
+    """
+    Outcome of one headless match.
+    - winner: 0 or 1
+    - win_condition: how the match was won
+    - shots: total shots fired by both players
+    """
+    winner: int
+    win_condition: WinCondition
+    shots: int
+
+
+@dataclass
+class BatchStats:
+    """
+    Aggregate over many matches; chunks from different workers are merged.
+    - wins: matches won by player 1 and player 2
+    - conditions: matches per win condition name
+    - lengths: histogram of match length in shots
+    """
+    games: int = 0
+    wins: List[int] = field(default_factory=lambda: [0, 0])
+    conditions: Dict[str, int] = field(default_factory=Counter)
+    lengths: Dict[int, int] = field(default_factory=Counter)
+
+    def add(self, result: MatchResult):
+        self.games += 1
+        self.wins[result.winner] += 1
+        self.conditions[result.win_condition.name] += 1
+        self.lengths[result.shots] += 1
+
+    def merge(self, other: 'BatchStats'):
+        self.games += other.games
+        self.wins[0] += other.wins[0]
+        self.wins[1] += other.wins[1]
+        self.conditions.update(other.conditions)
+        self.lengths.update(other.lengths)
+
+    def mean_length(self) -> float:
+        return sum(n * k for n, k in self.lengths.items()) / max(self.games, 1)
+
+    def summary(self) -> str:
+        games = max(self.games, 1)
+        lines = [
+            f"Games:             {self.games}",
+            f"Win rate:          P1 {self.wins[0]/games:.2%}   P2 {self.wins[1]/games:.2%}",
+            f"Game length:       mean {self.mean_length():.1f} shots, "
+            f"min {min(self.lengths, default=0)}, max {max(self.lengths, default=0)}",
+        ]
+        for cond in WinCondition:
+            lines.append(f"{cond.name.capitalize() + ':':18s} {self.conditions.get(cond.name, 0)/games:.2%}")
+        return '\n'.join(lines)
+
+### Runners ###
+
+def play_headless(game: Game, players) -> MatchResult:
+    """
+    Play game to the end, each player choosing shots through its AI.
+    players[i] must offer choose() and observe(coord, sig).
+    """
+    shots = 0
+    while game.winner is None:
+        ai = players[game.current]
+        coord = ai.choose()
+        ai.observe(coord, game.fire(coord))
+        shots += 1
+    return MatchResult(game.winner, game.win_condition, shots)
+
+
+def _run_chunk(task: Tuple[int, int, int, int, int, Dict[PieceType, int], str, str]) -> BatchStats:
+    """Worker entry point: play a chunk of games from its own seed."""
+    seed, games, depth, rows, cols, counts, ai_name, sampler = task
+    rng = random.Random(seed)
+    ai_cls = AI_PLAYERS[ai_name]
+    stats = BatchStats()
+    for _ in range(games):
+        game = Game(depth, rows, cols, counts, rng=rng, sampler=sampler)
+        players = [ai_cls(depth, rows, cols, counts, rng) for _ in range(2)]
+        stats.add(play_headless(game, players))
+    return stats
+
+
+def run_batch(games: int, depth: int, rows: int, cols: int,
+              counts: Dict[PieceType, int], ai: str = 'hunt',
+              workers: Optional[int] = None, seed: int = 0,
+              chunk: int = 1000, sampler: str = 'fast') -> BatchStats:
+    """
+    Play a batch of AI vs AI matches across a pool of workers, merging the stats.
+    The batch is split into chunks of at most chunk games, each seeded from
+    seed and its chunk number, so results do not depend on the worker count.
+    sampler selects the layout sampler (see Board3D.place_all).
+    """
+    tasks = []
+    for i, start in enumerate(range(0, games, chunk)):
+        chunk_seed = (seed << 32) + i
+        tasks.append((chunk_seed, min(chunk, games - start), depth, rows, cols, counts,
+                      ai, sampler))
+    stats = BatchStats()
+    if workers == 1:
+        for task in tasks:
+            stats.merge(_run_chunk(task))
+        return stats
+    with Pool(workers) as pool:
+        for part in pool.imap_unordered(_run_chunk, tasks):
+            stats.merge(part)
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run headless AI vs AI matches.")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=5)
+    parser.add_argument('--cols', type=int, default=5)
+    parser.add_argument('--subs', type=int, default=1)
+    parser.add_argument('--destroyers', type=int, default=1)
+    parser.add_argument('--jets', type=int, default=1)
+    parser.add_argument('--ai', choices=sorted(AI_PLAYERS), default='hunt')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sampler', choices=SAMPLERS, default='fast',
+                        help="layout sampler (uniform is slower but less biased)")
+    args = parser.parse_args()
+
+    counts = {
+        PieceType.SUBMARINE: args.subs,
+        PieceType.DESTROYER: args.destroyers,
+        PieceType.JET: args.jets,
+        PieceType.GENERAL: 1,
+    }
+    print(run_batch(args.games, 3, args.rows, args.cols, counts,
+                    ai=args.ai, workers=args.workers, seed=args.seed,
+                    sampler=args.sampler).summary())
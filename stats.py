@@ -0,0 +1,114 @@
+"""
+Opt-in instrumentation for 3D Submarines Game matches.
+- GameStats counts placement work and keeps latency histograms for shot
+  resolution, view drawing and input wait, per game
+- Nothing is measured unless a GameStats is passed to Game (or Board3D);
+  without one the instrumented paths only test an attribute for None
+Example:
+    stats = GameStats()
+    game = Game(3, 10, 10, counts, stats=stats)
+    ...
+    print(stats.summary())
+"""
+from typing import Callable, Dict, Optional
+
+# Bucket b of a Histogram holds samples of b significant bits: [2**(b-1), 2**b) ns
+_BUCKETS = 64
+
+
+class Histogram:
+    """
+    Latency histogram with power-of-two nanosecond buckets.
+    Adding a sample is a bit_length and a list increment; percentiles are
+    reported as their bucket's upper bound, so they are exact to within 2x.
+    """
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns: int):
+        self.buckets[min(ns.bit_length(), _BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    @property
+    def mean(self) -> float:
+        """Mean sample in ns (0.0 if empty)."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        """Upper bound in ns of the bucket holding the p-th percentile (0 if empty)."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for b, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(1 << b, self.max) if b else 0
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {'count': self.count, 'mean_ns': self.mean, 'p50_ns': self.percentile(50),
+                'p99_ns': self.percentile(99), 'max_ns': self.max}
+
+
+class GameStats:
+    """
+    Per-game counters and latency histograms, filled in by Game and Board3D.
+    Placement (both boards together):
+    - placements: pieces placed by search (not from a layout)
+    - placement_attempts: candidate placements tested against the occupancy
+    - backtracks: dead ends hit by Board3D._pack_layer
+    - exhaustive_layers: layers left to the exhaustive Board3D._cover_layer
+    Latencies, in ns:
+    - fire: Board3D.receive_fire_at per Game.fire_at shot
+    - salvo: Board3D.receive_fire_batch per Game.fire_salvo
+    - view, reveal: Game._print_view / Game._reveal_board, renderer included
+    - input_wait: time Game.start spends in input()
+    callback, if given, is called as callback(name, ns) after each latency
+    sample, e.g. to forward it to a metrics client.
+    """
+    LATENCIES = ('fire', 'salvo', 'view', 'reveal', 'input_wait')
+
+    def __init__(self, callback: Optional[Callable[[str, int], None]] = None):
+        self.callback = callback
+        self.placements = 0
+        self.placement_attempts = 0
+        self.backtracks = 0
+        self.exhaustive_layers = 0
+        self.fire = Histogram()
+        self.salvo = Histogram()
+        self.view = Histogram()
+        self.reveal = Histogram()
+        self.input_wait = Histogram()
+
+    def placed(self, pieces: int, attempts: int, backtracks: int = 0):
+        """Account for pieces placed after testing attempts candidate placements."""
+        self.placements += pieces
+        self.placement_attempts += attempts
+        self.backtracks += backtracks
+
+    def timed(self, name: str, ns: int):
+        """Add an ns latency sample to the histogram name."""
+        getattr(self, name).add(ns)
+        if self.callback is not None:
+            self.callback(name, ns)
+
+    def summary(self) -> Dict[str, object]:
+        """Counters and histogram summaries as a JSON-friendly dict."""
+        out: Dict[str, object] = {
+            'placements': self.placements,
+            'placement_attempts': self.placement_attempts,
+            'backtracks': self.backtracks,
+            'exhaustive_layers': self.exhaustive_layers,
+        }
+        for name in self.LATENCIES:
+            out[name] = getattr(self, name).summary()
+        return out
@@ -20,6 +20,32 @@ base_line = [(0,0), (1,0)]
 rots = _get_rotations(base_line)
 assert len(rots) == 2, f"Expected 2 unique rotations, got {len(rots)}"
 
+# Compiled shape tables: every placement in bounds, cover lists consistent
+from main import shape_table
+table = shape_table(PieceType.JET, 5, 6)
+assert len(table.masks) == 2*8 + 2*9, f"Expected 34 jet placements on 5x6, got {len(table.masks)}"
+for i, placed in enumerate(table.cells):
+    assert len(placed) == 6 and all(0 <= c < 30 for c in placed), f"Bad placement {placed}"
+    assert all(i in table.covering[c] for c in placed), "Cover list misses a placement"
+assert all(table.masks[i] == sum(1 << c for c in placed) for i, placed in enumerate(table.cells)), \
+    "Placement masks disagree with their cells"
+assert sorted(i for c in range(30) for i in table.starting_at(c)) == list(range(len(table))) and \
+    all(table.cells[i][0] == c for c in range(30) for i in table.starting_at(c)), \
+    "starting_at should list each placement once, at its lowest cell"
+assert shape_table(PieceType.JET, 5, 6) is table, "Shape tables should be cached"
+
+# NumPy heatmap matches a direct count over the shape table
+import numpy as np
+from heatmap import placement_density
+blocked = np.random.default_rng(0).random((7, 9)) < 0.2
+heat = placement_density(blocked, PieceType.JET)
+expected = np.zeros(7 * 9, dtype=int)
+jet_table = shape_table(PieceType.JET, 7, 9)
+for placed in jet_table.cells:
+    if not any(blocked.flat[c] for c in placed):
+        expected[list(placed)] += 1
+assert (heat.ravel() == expected).all(), "NumPy heatmap disagrees with shape table counts"
+
 ### Board3D placement and firing tests ###
 
 # Create a small board and place exactly one of each piece
@@ -53,6 +79,22 @@ for p in board2.pieces:
         for c in p.coords:
             board2.receive_fire(c)
 assert board2.all_non_general_sunk(), "Not all non-general pieces are recognized as sunk"
+# Live counters drop once per sunk piece, however often it is hit
+assert all(p.remaining == 0 for p in board2.pieces if p.piece_type == PieceType.DESTROYER), \
+    "Sunk destroyer should have no cells remaining"
+assert board2.live[PieceType.SUBMARINE] == 0 and board2.live[PieceType.GENERAL] == 1, \
+    f"Wrong live counts: {board2.live}"
+# Sinking through Piece.register_hit keeps the same counts
+board3 = Board3D(depth=3, rows=5, cols=5)
+board3.place_all(counts)
+for p in board3.pieces:
+    if p.piece_type != PieceType.GENERAL:
+        for c in p.coords:
+            p.register_hit(c)
+assert board3.all_non_general_sunk(), "register_hit sinks should count towards the win condition"
+assert board3.live == board2.live, f"Wrong live counts after register_hit: {board3.live}"
+assert board3.hit_mask == sum(1 << i for p in board3.pieces if p.piece_type != PieceType.GENERAL
+                              for i in p.cells), "register_hit should record its hits in hit_mask"
 
 ### Main flow test ###
 
@@ -65,4 +107,559 @@ gen_coord = next(iter(gen_piece.coords))
 sig = game.boards[1].receive_fire(gen_coord)
 assert sig == Signal.KILL, f"Killing General should return KILL, got {sig} insted"
 
+### Shot ledger tests ###
+
+# Each shot is recorded once; a destroyer kill upgrades its earlier hits
+ledger_game = Game(depth=3, rows=5, cols=5, counts=counts)
+target = ledger_game.boards[1]
+destroyer = next(p for p in target.pieces if p.piece_type == PieceType.DESTROYER)
+cells = sorted(destroyer.coords)
+assert ledger_game.fire(cells[0]) == Signal.HIT, "First destroyer shot should HIT"
+assert ledger_game.ledger[0] == {target.index(cells[0]): Signal.HIT}, "Ledger missed the HIT"
+for c in cells[1:]:
+    ledger_game.fire(c)
+assert all(ledger_game.ledger[0][target.index(c)] == Signal.KILL for c in cells), \
+    "Sunk destroyer cells should all read KILL"
+assert ledger_game._view[0].count(b'!') == len(cells), "View buffer out of sync with ledger"
+import contextlib, io
+with contextlib.redirect_stdout(io.StringIO()):
+    ledger_game._print_view()
+assert bin(target.hit_mask).count('1') == len(cells), "Rendering must not fire at the board"
+
+### Renderer tests ###
+
+from render import DiffRenderer, NullRenderer, TextRenderer
+frame = io.StringIO()
+TextRenderer(frame).view(ledger_game)
+lines = frame.getvalue().split('\n')
+assert lines[0] == "Player 1's view (levels 0..2):" and lines[1] == " Level 0:", "Frame header wrong"
+assert all(len(row) == 9 for z in range(3) for row in lines[2 + 7 * z:7 + 7 * z]), "Rows should be 'c c c c c'"
+assert frame.getvalue().count('!') == len(cells), "Frame should show the sunk destroyer"
+reveal = io.StringIO()
+TextRenderer(reveal).reveal(ledger_game, 1)
+assert reveal.getvalue().count('#') == bin(target.occupancy).count('1'), "Reveal should show every occupied cell"
+screen = io.StringIO()
+diff = DiffRenderer(screen)
+diff.view(ledger_game)
+first = len(screen.getvalue())
+jet = next(p for p in target.pieces if p.piece_type == PieceType.JET)
+assert ledger_game.fire(next(iter(jet.coords))) == Signal.KILL, "Jet shot should KILL"  # keeps the turn
+diff.view(ledger_game)
+assert len(screen.getvalue()) - first < 40, "A diff frame should only rewrite changed cells"
+quiet = io.StringIO()
+with contextlib.redirect_stdout(quiet):
+    Game(3, 5, 5, counts, seed=1, renderer=NullRenderer())._print_view()
+assert quiet.getvalue() == "", "NullRenderer should draw nothing"
+
+### Headless play tests ###
+
+import random
+from main import WinCondition
+from simulate import HuntTargetAI, play_headless, run_batch
+# Firing through Game.fire ends with a winner and a win condition
+headless = Game(depth=3, rows=5, cols=5, counts=counts)
+ais = [HuntTargetAI(3, 5, 5, counts, random.Random(i)) for i in range(2)]
+result = play_headless(headless, ais)
+assert result.winner == headless.winner and result.winner in (0, 1), "Headless game has no winner"
+assert isinstance(result.win_condition, WinCondition), f"Bad win condition {result.win_condition}"
+# The density AI never fires at the same cell twice and finishes the game
+from ai import DensityAI
+density_game = Game(depth=3, rows=6, cols=6, counts=counts)
+density_ais = [DensityAI(3, 6, 6, counts, random.Random(i)) for i in range(2)]
+result = play_headless(density_game, density_ais)
+assert result.shots == sum(bin(m).count('1') for m in density_game.shot_masks), \
+    "Density AI repeated a shot"
+# Batches are reproducible per seed and aggregate every game
+stats = run_batch(50, 3, 5, 5, counts, workers=1, seed=7, chunk=20)
+assert stats.games == 50 and sum(stats.wins) == 50, f"Batch lost games: {stats}"
+assert stats.lengths == run_batch(50, 3, 5, 5, counts, workers=1, seed=7, chunk=20).lengths, \
+    "Seeded batches differ"
+
+### Game server tests ###
+
+import asyncio
+from server import Client, GameServer, random_player
+
+async def _server_match():
+    server = GameServer(3, 5, 5, counts)
+    srv = await server.start()
+    port = srv.sockets[0].getsockname()[1]
+    # two random players finish a match: one wins, the other loses
+    finals = await asyncio.gather(random_player('127.0.0.1', port, random.Random(1)),
+                                  random_player('127.0.0.1', port, random.Random(2)))
+    assert sorted(f.split()[0] for f in finals) == ['LOSE', 'WIN'], f"Unexpected endings {finals}"
+    # protocol errors leave the match untouched; quitting aborts the opponent
+    a = await Client.connect('127.0.0.1', port)
+    assert await a.recv() == 'WAIT'
+    b = await Client.connect('127.0.0.1', port)
+    assert (await a.recv()).startswith('START 1') and await a.recv() == 'TURN'
+    assert (await b.recv()).startswith('START 2')
+    await b.send('0,0,0')
+    assert await b.recv() == 'ERR Not your turn.'
+    await a.send('zap')
+    assert (await a.recv()).startswith('ERR Invalid format')
+    await a.send('quit')
+    assert await a.recv() == 'BYE' and await b.recv() == 'ABORT'
+    await a.close()
+    await b.close()
+    # an over-long line drops its sender and still aborts the opponent
+    a = await Client.connect('127.0.0.1', port)
+    assert await a.recv() == 'WAIT'
+    b = await Client.connect('127.0.0.1', port)
+    for client in (a, a, b):
+        await client.recv()
+    await a.send('x' * (1 << 17))
+    assert await b.recv() == 'ABORT', "Opponent of a dropped client should see ABORT"
+    await a.close()
+    await b.close()
+    # a client that leaves while waiting is never paired
+    a = await Client.connect('127.0.0.1', port)
+    assert await a.recv() == 'WAIT'
+    await a.close()
+    b = await Client.connect('127.0.0.1', port)
+    assert await b.recv() == 'WAIT', "A client that left should not be paired"
+    c = await Client.connect('127.0.0.1', port)
+    assert (await b.recv()).startswith('START 1') and (await c.recv()).startswith('START 2')
+    await b.send('quit')
+    await b.close()
+    await c.close()
+    # a match that cannot be set up reports ERR to both clients
+    server.counts = {PieceType.SUBMARINE: 1}
+    a = await Client.connect('127.0.0.1', port)
+    assert await a.recv() == 'WAIT'
+    b = await Client.connect('127.0.0.1', port)
+    assert (await a.recv()).startswith('ERR') and (await b.recv()).startswith('ERR'), \
+        "A failed pairing should not leave the waiting client hanging"
+    await a.close()
+    await b.close()
+    srv.close()
+    await srv.wait_closed()
+    assert server.active == 0 and server.finished == 4, "Server lost track of matches"
+
+asyncio.run(_server_match())
+try:
+    GameServer(3, 5, 5, {PieceType.SUBMARINE: 9, PieceType.GENERAL: 1})
+    assert False, "The server should reject a fleet that cannot fit"
+except ValueError:
+    pass
+
+### Replay log tests ###
+
+from replay import ReplayReader, ReplayWriter
+# Record a headless match, then read it back turn by turn
+recorded = Game(depth=3, rows=5, cols=5, counts=counts)
+log = io.BytesIO()
+ReplayWriter(log).attach(recorded)
+play_headless(recorded, [HuntTargetAI(3, 5, 5, counts, random.Random(i)) for i in range(2)])
+reader = ReplayReader(io.BytesIO(log.getvalue()))
+total = sum(bin(m).count('1') for m in recorded.shot_masks)
+assert len(reader) == total, f"Expected {total} shots in replay, got {len(reader)}"
+assert len(log.getvalue()) - reader._shots_at == 4 * total, "Shots should take 4 bytes each"
+replayed = reader.game_at()
+assert (replayed.winner, replayed.win_condition) == (recorded.winner, recorded.win_condition), \
+    "Replay ends differently"
+assert replayed.ledger == recorded.ledger, "Replayed ledger differs"
+mid = total // 2
+assert reader.shot(mid) == next(reader.shots(mid)), "Seek and stream disagree"
+assert len(reader.game_at(mid).ledger[0]) + len(reader.game_at(mid).ledger[1]) == mid, \
+    "Partial replay should hold exactly mid shots"
+# Seeded replays store the placement seed instead of the layouts
+seeded_log = io.BytesIO()
+seeded = Game(depth=3, rows=5, cols=5, counts=counts, seed=1234)
+ReplayWriter(seeded_log, seeded=True).attach(seeded)
+play_headless(seeded, [HuntTargetAI(3, 5, 5, counts, random.Random(i)) for i in range(2)])
+seeded_reader = ReplayReader(io.BytesIO(seeded_log.getvalue()))
+assert seeded_reader._shots_at < reader._shots_at, "Seeded header should be smaller"
+assert seeded_reader.game_at().ledger == seeded.ledger, "Seeded replay differs"
+
+### Seeded placement tests ###
+
+# The same seed gives the same layouts, from either a seed or an injected generator
+assert Game(3, 5, 5, counts, seed=7).boards[1].layout() == \
+    Game(3, 5, 5, counts, seed=7).boards[1].layout(), "Seeded games should match"
+a, b = Board3D(3, 5, 5, rng=random.Random(3)), Board3D(3, 5, 5)
+a.place_all(counts)
+b.place_all(counts, rng=random.Random(3))
+assert a.layout() == b.layout(), "Board and place_all generators should agree"
+c, d = Board3D(3, 5, 5, rng=np.random.default_rng(5)), Board3D(3, 5, 5, rng=np.random.default_rng(5))
+c.place_all(counts)
+d.place_all(counts)
+assert c.layout() == d.layout(), "NumPy generators should place reproducibly"
+drawn = Game(3, 5, 5, counts, rng=random.Random(9))
+assert Game(3, 5, 5, counts, seed=drawn.seed).boards[0].layout() == drawn.boards[0].layout(), \
+    "Game.seed should reproduce the game"
+
+### Layout pool tests ###
+
+from layouts import LayoutPool
+pool = LayoutPool(size=4, max_configs=2, seed=0)
+pool.warm(3, 5, 5, counts)
+assert pool.pending(3, 5, 5, counts) == 4, "warm() should fill the pool"
+pooled = pool.board(3, 5, 5, counts)
+assert sorted(p.piece_type.value for p in pooled.pieces) == \
+    sorted(p.value for p, n in counts.items() for _ in range(n)), "Pooled board has the wrong fleet"
+assert (pool.hits, pool.misses) == (1, 1), "Second request should come from the pool"
+pool_game = pool.game(3, 5, 5, counts)
+assert pool_game.boards[0].occupancy and pool_game.boards[1].occupancy, "Pooled game boards are empty"
+# Two newer configurations push the first one out
+for n in (2, 3):
+    pool.layout(3, 5, 5, {**counts, PieceType.SUBMARINE: n})
+assert pool.pending(3, 5, 5, counts) == 0, "Least recently used configuration should be evicted"
+pool.close()
+# Sampling mode keeps the pool and hands out its layouts
+sampler = LayoutPool(size=3, sample=True, seed=1)
+sampler.warm(3, 5, 5, counts)
+kept = set(sampler._pools[next(iter(sampler._pools))])
+assert all(sampler.layout(3, 5, 5, counts) in kept for _ in range(20)), "Sampled layouts should come from the pool"
+assert sampler.pending(3, 5, 5, counts) == 3, "Sampling should not drain the pool"
+sampler.close()
+
+### Placement engine tests ###
+
+# The uniform sampler places the same fleet, legally
+uniform_board = Board3D(depth=3, rows=5, cols=5, rng=11)
+uniform_board.place_all(counts, sampler='uniform')
+assert sorted(p.piece_type.value for p in uniform_board.pieces) == \
+    sorted(p.value for p, n in counts.items() for _ in range(n)), "Uniform sampler placed the wrong fleet"
+assert len(uniform_board.occupied) == sum(len(p.coords) for p in uniform_board.pieces), \
+    "Uniform sampler placed overlapping pieces"
+# On a crowded layer it also moves pieces in pairs, still legally
+crowded = Board3D(depth=3, rows=7, cols=7, rng=4)
+crowded.place_all({PieceType.DESTROYER: 11, PieceType.GENERAL: 1}, sampler='uniform')
+assert len(crowded.pieces) == 12 and len(crowded.occupied) == 45, "Crowded uniform layout is not legal"
+try:
+    Board3D(depth=3, rows=5, cols=5).place_all(counts, sampler='sorted')
+    assert False, "Unknown sampler should be rejected"
+except ValueError:
+    pass
+
+# A 7x7 layer holds 12 destroyers with a single cell to spare
+dense = Board3D(depth=3, rows=7, cols=7)
+packed = dense._cover_layer([PieceType.DESTROYER] * 12)
+assert len(packed) == 12, f"Expected 12 destroyers, got {len(packed)}"
+layer_used = 0
+for ptype, i in packed:
+    mask = shape_table(ptype, 7, 7).mask(i)
+    assert not mask & layer_used, "Overlapping placements in dense layer"
+    layer_used |= mask
+# Covered layouts are randomly mirrored, but never onto cells already taken
+taken_cells = 1 << 0 | 1 << 6  # top corners: only the left-right mirror keeps them
+for seed in range(20):
+    layer_used = taken_cells
+    for ptype, i in dense._cover_layer([PieceType.DESTROYER] * 11, random.Random(seed), taken_cells):
+        mask = shape_table(ptype, 7, 7).mask(i)
+        assert not mask & layer_used, "Covered layout overlaps taken cells"
+        layer_used |= mask
+# ...but not 13
+try:
+    dense._cover_layer([PieceType.DESTROYER] * 13)
+    assert False, "13 destroyers cannot fit on a 7x7 layer"
+except RuntimeError:
+    pass
+
+# place_all keeps a report of how each piece was placed
+from main import PlacementError
+
+report_board = Board3D(depth=3, rows=7, cols=7, rng=3)
+report_board.place_all({PieceType.DESTROYER: 12, PieceType.GENERAL: 1})
+report = report_board.placement
+assert report.error is None and report.fill[1] in (48 / 49, 1.0) and report.demand[1] == 48 / 49, \
+    f"Report fill wrong: {report.fill}"
+packed_types = [p for p, _ in report.attempts]
+assert packed_types.count(PieceType.GENERAL) == 1 and \
+    (len(packed_types) == 13 or report.exhaustive == [1] and report.cover_attempts[1] >= 12), \
+    "Report should account for every piece"
+# Without the walks, an empty layer comes from capacity.py's packing; the
+# exhaustive search around earlier pieces gives up once its budget is spent
+import main
+saved = main.COVER_RESTARTS, main.COVER_BUDGET
+main.COVER_RESTARTS, main.COVER_BUDGET = 0, 5
+try:
+    witnessed = Board3D(depth=3, rows=7, cols=7, rng=3)
+    witnessed.place_all({PieceType.DESTROYER: 12, PieceType.GENERAL: 1}, sampler='uniform')
+    assert len(witnessed.occupied) == 49 and len(witnessed.pieces) == 13, \
+        "Packing fallback placed the wrong fleet"
+    around = Board3D(depth=3, rows=7, cols=7, rng=3)
+    around._add_cells(PieceType.GENERAL, [around.index((3, 3, 1))])
+    around.place_all({PieceType.DESTROYER: 11, PieceType.GENERAL: 1})
+    assert False, "A spent search budget should fail the placement"
+except PlacementError as e:
+    assert "Gave up" in str(e) and e.report.cover_attempts[1] >= 5, f"Wrong budget failure: {e}"
+finally:
+    main.COVER_RESTARTS, main.COVER_BUDGET = saved
+# A layer whose free cells hold no destroyer fails with the report attached
+blocked = Board3D(depth=2, rows=3, cols=4)
+for y in range(3):
+    blocked._add_cells(PieceType.GENERAL, [blocked.index((1, y, 1))])
+try:
+    blocked.place_all({PieceType.DESTROYER: 1, PieceType.GENERAL: 1})
+    assert False, "No destroyer fits around a blocked column"
+except PlacementError as e:
+    assert isinstance(e, RuntimeError) and e.report is blocked.placement, "Report not attached"
+    assert e.report.free_anchors[PieceType.DESTROYER] == 0 and e.report.fill == {0: 0.0, 1: 0.25}, \
+        f"Failure report wrong: {e.report}"
+# Pieces already placed stay put: a second place_all fills in around them
+twice = Board3D(depth=3, rows=7, cols=7, rng=4)
+half = {PieceType.SUBMARINE: 5, PieceType.DESTROYER: 4, PieceType.JET: 2, PieceType.GENERAL: 1}
+twice.place_all(half)
+first = twice.layout()
+twice.place_all(half)
+assert twice.layout()[:len(first)] == first and len(twice.pieces) == 2 * len(first), \
+    "Second place_all should keep the first layout"
+assert len(twice.occupied) == sum(len(p.coords) for p in twice.pieces) and \
+    all(twice.piece_at(i) == p for p in twice.pieces for i in p.cells), \
+    "Second place_all overlapped earlier pieces"
+try:
+    full_board = Board3D(depth=1, rows=3, cols=4)
+    full_board.apply_layout([(PieceType.GENERAL, [i]) for i in range(12)])
+    full_board.place_all({PieceType.GENERAL: 1})
+    assert False, "A full board cannot take another piece"
+except ValueError:
+    pass
+
+### Capacity tests ###
+
+from capacity import capacity_bounds, max_pieces
+from main import _SHAPES_2D
+# Exact packings, beyond what a bounding-box estimate allows
+assert max_pieces(5, 5, _SHAPES_2D[PieceType.SUBMARINE]) == 8, "5x5 holds 8 submarines"
+assert max_pieces(7, 7, _SHAPES_2D[PieceType.DESTROYER]) == 12, "7x7 holds 12 destroyers"
+assert max_pieces(8, 8, _SHAPES_2D[PieceType.JET]) == 8, "8x8 holds 8 jets"
+# packing() lays out that many copies, without overlaps
+from capacity import packing
+for rows, cols, ptype in ((7, 7, PieceType.DESTROYER), (8, 8, PieceType.JET), (13, 7, PieceType.JET),
+                          (11, 12, PieceType.SUBMARINE), (10, 23, PieceType.JET)):
+    pieces = packing(rows, cols, _SHAPES_2D[ptype])
+    shapes = {frozenset(s) for s in _SHAPES_2D[ptype]}
+    cells = [c for piece in pieces for c in piece]
+    assert len(pieces) == capacity_bounds(rows, cols, _SHAPES_2D[ptype])[0] and \
+        len(cells) == len(set(cells)) and all(0 <= x < cols and 0 <= y < rows for x, y in cells), \
+        f"Bad packing of {ptype.name} on {rows}x{cols}"
+    for piece in pieces:
+        x0, y0 = min(x for x, _ in piece), min(y for _, y in piece)
+        assert frozenset((x - x0, y - y0) for x, y in piece) in shapes, f"Bad shape {piece}"
+# place_all accepts a full packing and rejects one piece more up front
+crowded = {PieceType.SUBMARINE:8, PieceType.DESTROYER:1, PieceType.JET:1, PieceType.GENERAL:1}
+Board3D(depth=3, rows=5, cols=5).place_all(crowded)
+try:
+    Board3D(depth=3, rows=5, cols=5).place_all({**crowded, PieceType.SUBMARINE: 9})
+    assert False, "9 submarines cannot fit on a 5x5 layer"
+except ValueError:
+    pass
+# Fleets at exactly the known capacity are always placed, however crowded
+for dims, ptype in (((3, 10, 15), PieceType.JET), ((3, 30, 30), PieceType.DESTROYER)):
+    most = capacity_bounds(dims[1], dims[2], _SHAPES_2D[ptype])[0]
+    for seed in range(2):
+        at_capacity = Board3D(*dims, rng=seed)
+        at_capacity.place_all({ptype: most, PieceType.GENERAL: 1})
+        assert sum(p.piece_type is ptype for p in at_capacity.pieces) == most, \
+            f"{most} {ptype.name}s should fit on {dims[1]}x{dims[2]}"
+# Where only bounds are known, fleets above the lower bound are rejected
+lower, upper = capacity_bounds(11, 11, _SHAPES_2D[PieceType.JET])
+assert lower < upper, "11x11 jets should only have bounds"
+Board3D(depth=3, rows=11, cols=11, rng=0).place_all({PieceType.JET: lower // 2, PieceType.GENERAL: 1})
+try:
+    Board3D(depth=3, rows=11, cols=11).place_all({PieceType.JET: lower + 1, PieceType.GENERAL: 1})
+    assert False, "Jets above the known capacity should be rejected"
+except ValueError as e:
+    assert f"at most {lower} are known to fit" in str(e), f"Wrong capacity message: {e}"
+
+### Batch fire tests ###
+
+# A batch gives the same signals and final state as firing one shot at a time,
+# repeats and multi-hit kills within the batch included
+batch_counts = {PieceType.SUBMARINE: 4, PieceType.DESTROYER: 3, PieceType.JET: 2, PieceType.GENERAL: 1}
+for trial in range(20):
+    one = Board3D(3, 6, 6, rng=trial)
+    one.place_all(batch_counts)
+    many = Board3D(3, 6, 6)
+    many.apply_layout(one.layout())
+    shot_rng = random.Random(trial)
+    shots_in = [shot_rng.randrange(3 * 6 * 6) for _ in range(150)]
+    one.receive_fire_at(shots_in[0])
+    many.receive_fire_at(shots_in[0])
+    sequential = [one.receive_fire_at(i).value for i in shots_in]
+    assert many.receive_fire_batch(np.array(shots_in)).tolist() == sequential, "Batch signals differ"
+    assert (many.hit_mask, many.live, many._afloat) == (one.hit_mask, one.live, one._afloat), \
+        "Batch board state differs"
+    assert many.pieces.remaining == one.pieces.remaining, "Batch piece state differs"
+coords_in = np.array([[x, y, z] for z in range(3) for y in range(6) for x in range(6)])
+assert Board3D(3, 6, 6).receive_fire_batch(coords_in).tolist() == [Signal.MISS.value] * 108, \
+    "(x, y, z) rows should be accepted"
+# Off-board rows miss without touching the board; bad flat indices are rejected
+edge_batch = Board3D(3, 6, 6)
+edge_batch.apply_layout([(PieceType.SUBMARINE, [105, 106, 107])])  # -1 would wrap to 107
+wrapped = [[-1, 0, 0], [0, -1, 1], [6, 5, 0], [0, 0, 3], [5, 5, 2]]
+assert edge_batch.receive_fire_batch(np.array(wrapped)).tolist() == \
+    [edge_batch.receive_fire(tuple(c)).value for c in wrapped], "Off-board rows should MISS"
+assert edge_batch.hit_mask == 1 << 107, "Off-board rows must not hit wrapped cells"
+for bad in ([-1], [108]):
+    try:
+        edge_batch.receive_fire_batch(np.array(bad))
+        assert False, f"Flat index {bad} should be rejected"
+    except IndexError:
+        pass
+
+### Salvo mode tests ###
+
+salvo_game = Game(3, 5, 5, counts, seed=21, salvo=True)
+salvo_log = io.BytesIO()
+ReplayWriter(salvo_log).attach(salvo_game)
+assert salvo_game.salvo_size() == 3, f"Three vessels afloat should give 3 shots, got {salvo_game.salvo_size()}"
+for bad in ("0,0,0", "0,0,0 0,0,0 0,0,1", "0,0,0 0,0,1 9,9,9"):
+    try:
+        salvo_game.parse_salvo(bad)
+        assert False, f"Salvo {bad!r} should be rejected"
+    except ValueError:
+        pass
+assert salvo_game.parse_salvo("0,0,0; 0,0,1 1,2,3") == [0, 1, 25 + 2 * 5 + 3], "Salvo parse wrong"
+salvo_rng = random.Random(4)
+while salvo_game.winner is None:
+    shooter = salvo_game.current
+    unfired = [i for i in range(75) if not salvo_game.shot_masks[shooter] >> i & 1]
+    volley = salvo_rng.sample(unfired, salvo_game.salvo_size())
+    sigs = salvo_game.fire_salvo(volley)
+    assert len(sigs) == len(volley) and all(i in salvo_game.ledger[shooter] for i in volley), \
+        "Every salvo shot should be recorded"
+    assert salvo_game.winner is not None or salvo_game.current != shooter, "A salvo should pass the turn"
+salvo_replay = ReplayReader(io.BytesIO(salvo_log.getvalue())).game_at()
+assert (salvo_replay.winner, salvo_replay.win_condition, salvo_replay.ledger) == \
+    (salvo_game.winner, salvo_game.win_condition, salvo_game.ledger), "Salvo replay differs"
+
+### Snapshot tests ###
+
+branch_game = Game(3, 5, 5, counts, seed=13, renderer=NullRenderer())
+branch_rng = random.Random(13)
+branch_cells = list(range(75))
+branch_rng.shuffle(branch_cells)
+branch_snap = branch_game.snapshot()
+branch_board = branch_game.boards[1]
+board_snap = branch_board.snapshot()
+before = (branch_board.hit_mask, bytes(branch_board.pieces.hit), list(branch_board.pieces.remaining),
+          dict(branch_board.live), branch_board.all_non_general_sunk())
+first_run = []
+for _ in range(2):
+    run = []
+    for i in branch_cells:
+        if branch_game.winner is not None:
+            break
+        if not branch_game.shot_masks[branch_game.current] >> i & 1:
+            run.append(branch_game.fire_at(i))
+    first_run = first_run or run
+    assert run == first_run, "A restored game should replay identically"
+    outcome = (branch_game.winner, branch_game.win_condition, dict(branch_game.ledger[0]))
+    branch_game.restore(branch_snap)
+    assert branch_game.winner is None and branch_game.shot_masks == [0, 0] and \
+        branch_game.ledger == [{}, {}] and bytes(branch_game._view[0]) == b'.' * 75, \
+        "Game restore should clear shots"
+    assert (branch_board.hit_mask, bytes(branch_board.pieces.hit), list(branch_board.pieces.remaining),
+            dict(branch_board.live), branch_board.all_non_general_sunk()) == before, \
+        "Board restore should undo hits"
+branch_board.receive_fire_at(branch_board.pieces[0].cells[0])
+branch_board.restore(board_snap)
+assert branch_board.hit_mask == 0, "Board snapshot should be reusable"
+try:
+    Board3D(3, 5, 5).restore(board_snap)
+    assert False, "Another board's snapshot should be rejected"
+except ValueError:
+    pass
+
+### Instrumentation tests ###
+
+from stats import GameStats, Histogram
+
+samples = []
+game_stats = GameStats(callback=lambda name, ns: samples.append(name))
+stats_game = Game(3, 5, 5, counts, seed=8, renderer=NullRenderer(), stats=game_stats)
+assert game_stats.placements == 2 * sum(counts.values()), \
+    f"Every placed piece should be counted, got {game_stats.placements}"
+assert game_stats.placement_attempts >= game_stats.placements, "Attempts should cover placements"
+stats_game._print_view()
+stats_game._reveal_board(0)
+shots_fired = 0
+for i in range(75):
+    if stats_game.winner is not None:
+        break
+    if not stats_game.shot_masks[stats_game.current] >> i & 1:
+        stats_game.fire_at(i)
+        shots_fired += 1
+assert game_stats.fire.count == shots_fired and game_stats.view.count == 1 \
+    and game_stats.reveal.count == 1, "Latency histograms should count every sample"
+assert samples.count('fire') == shots_fired, "Callback should see every sample"
+assert game_stats.summary()['fire']['p50_ns'] <= game_stats.fire.max, "Percentile above max"
+hist = Histogram()
+for ns in (1, 3, 100, 1000):
+    hist.add(ns)
+assert (hist.percentile(50), hist.percentile(100), hist.mean) == (4, 1000, 276.0), "Histogram stats wrong"
+assert Game(3, 5, 5, counts, seed=8, renderer=NullRenderer()).stats is None, "Stats should be opt-in"
+
+### Posterior sampler tests ###
+
+from posterior import PosteriorSampler
+
+def final_ledger(layout, fired):
+    """Shot results fired would leave in a ledger against layout."""
+    replay_board = Board3D(3, 6, 6)
+    replay_board.apply_layout(layout)
+    for i in fired:
+        replay_board.receive_fire_at(i)
+    results = {}
+    for i in fired:
+        pid = replay_board.piece_ids[i]
+        results[i] = Signal.MISS if pid < 0 else \
+            Signal.KILL if replay_board.pieces.is_sunk(pid) else Signal.HIT
+    return results
+
+post_counts = {PieceType.SUBMARINE: 2, PieceType.DESTROYER: 2, PieceType.JET: 1, PieceType.GENERAL: 1}
+post_game = Game(3, 6, 6, post_counts, seed=17, renderer=NullRenderer())
+post_cells = list(range(108))
+random.Random(17).shuffle(post_cells)
+sampler = PosteriorSampler(3, 6, 6, post_counts, rng=17, samples=50)
+for turn_cells in (post_cells[:15], post_cells[15:30]):
+    for i in turn_cells:
+        post_game.current = 0  # player 1 fires every shot
+        if post_game.winner is None:
+            post_game.fire_at(i)
+    kept = [list(m.pool) for m in sampler.models]
+    sampler.update(post_game.ledger[0])
+    assert all(set(m.pool) <= set(k) for m, k in zip(sampler.models, kept)), \
+        "Update should only drop samples"
+    sampler.refresh()
+    assert all(len(m.pool) >= 50 for m in sampler.models), "Refresh should fill every pool"
+    for layout in sampler.layouts(20):
+        assert final_ledger(layout, post_game.ledger[0]) == post_game.ledger[0], \
+            "Sampled layout contradicts the shots"
+occ = sampler.occupancy()
+assert occ.shape == (3, 6, 6) and abs(occ.sum() - (2 * 3 + 2 * 4 + 6 + 1)) < 1e-9, \
+    f"Occupancy should add up to the fleet's cells, got {occ.sum()}"
+assert all(occ.flat[i] == (0.0 if sig is Signal.MISS else 1.0) for i, sig in post_game.ledger[0].items()), \
+    "Fired cells should have known occupancy"
+parallel = PosteriorSampler(3, 6, 6, post_counts, rng=18, samples=400, workers=1)
+parallel.update(post_game.ledger[0])
+assert parallel.refresh(budget=0.5) > 0 and all(parallel.models[z].pool for z in range(3)), \
+    "Budgeted refresh should add samples"
+parallel.close()
+
+### Bitboard tests ###
+
+# Occupancy bitboard matches the occupied dict view
+assert bin(board.occupancy).count('1') == len(board.occupied), "Occupancy bitboard out of sync"
+for c in board.occupied:
+    assert board.occupancy & board.bit(c), f"Cell {c} missing from occupancy bitboard"
+# Flat cell indices round-trip, and piece_ids agree with the occupied view
+assert all(board.index(board.coord(i)) == i for i in range(3 * 5 * 5)), "index/coord should round-trip"
+for c, piece in board.occupied.items():
+    assert board.piece_at(board.index(c)) == piece, f"piece_ids disagrees at {c}"
+assert board.occupied.get((9, 9, 9)) is None, "Out-of-range lookups should miss"
+# Off-board shots miss without wrapping onto another cell or touching state
+edge = Board3D(depth=1, rows=5, cols=5)
+edge.apply_layout([(PieceType.SUBMARINE, [edge.index((0, 1, 0))]), (PieceType.SUBMARINE, [edge.index((4, 4, 0))])])
+for c in [(0, 0, 3), (-1, 0, 0), (5, 0, 0), (0, -1, 0), (0, 5, 0)]:
+    assert edge.receive_fire(c) == Signal.MISS, f"Off-board shot {c} should miss"
+assert edge.hit_mask == 0 and edge.live[PieceType.SUBMARINE] == 2, "Off-board shots should not hit anything"
+assert game.parse_cell("2,1,3") == game.boards[0].index((3, 1, 2)), "parse_cell should give the flat index"
+# Shot masks decode back into coordinate sets
+game.shot_masks[0] |= game.boards[1].bit((1,2,0))
+assert game.shots[0] == {(1,2,0)}, f"Shots view wrong: {game.shots[0]}"
+
 print("All tests passed successfully!")